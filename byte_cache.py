@@ -0,0 +1,92 @@
+from collections import OrderedDict
+
+'''
+====Byte-Bounded LRU Cache====
+Shared by the tree impostors, tree geometry and terrain textures. Every
+entry is stored with its size in bytes; once the total goes over maxBytes
+the least recently used entries are evicted until it fits again.
+
+    cache = ByteLRUCache(32 * 1024 * 1024)
+    cache.put(key, value, nbytes)
+    cache.get(key)                  -> value or None (counts a hit/miss)
+    cache.removeWhere(predicate)    -> drop every key the predicate accepts
+
+A single entry larger than the whole budget is not stored at all.
+'''
+
+class ByteLRUCache:
+    def __init__(self, maxBytes):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()  # key -> (value, nbytes), oldest first
+        self.totalBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def peek(self, key, default=None):
+        """Look up without touching recency or the hit/miss counters"""
+        entry = self.entries.get(key)
+        return default if entry is None else entry[0]
+
+    def put(self, key, value, nbytes):
+        self.pop(key)
+        if nbytes > self.maxBytes:
+            return False
+        self.entries[key] = (value, nbytes)
+        self.totalBytes += nbytes
+        self._evict()
+        return True
+
+    def pop(self, key, default=None):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return default
+        self.totalBytes -= entry[1]
+        return entry[0]
+
+    def removeWhere(self, predicate):
+        stale = [key for key in self.entries if predicate(key)]
+        for key in stale:
+            self.pop(key)
+        return len(stale)
+
+    def setMaxBytes(self, maxBytes):
+        self.maxBytes = maxBytes
+        self._evict()
+
+    def _evict(self):
+        while self.totalBytes > self.maxBytes and self.entries:
+            _, (_, nbytes) = self.entries.popitem(last=False)
+            self.totalBytes -= nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.totalBytes = 0
+
+    def getStats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.totalBytes,
+            'maxBytes': self.maxBytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hitRate': self.hits / lookups if lookups else 0.0
+        }
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
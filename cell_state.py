@@ -0,0 +1,315 @@
+import numpy as np
+
+'''
+====Cell State Store====
+Dense, array-backed replacement for the old string-keyed cellStates dict.
+
+    lifeRatio[row, col]   -> float32 deterioration stored at lastUpdate (0 = healthy, 1 = dead)
+    terrainIds[row, col]  -> int16 index into terrainNames (-1 = not initialized)
+    lastUpdate[row, col]  -> int32 clock value of the last write
+    decays[row, col]      -> False for uninitialized and static (water) cells
+
+Cells are addressed by (row, col) everywhere:
+    store[row, col]             -> current lifeRatio (KeyError if not initialized)
+    store.get((row, col))       -> current lifeRatio or None
+    (row, col) in store         -> initialized?
+
+Lazy deterioration:
+    Away from healing, a cell only climbs linearly, so the stored value is
+    not stepped every tick. The current value is derived when read:
+
+        current = min(1, lifeRatio + decayRate * (clock - lastUpdate))
+
+    Writers (healing) call write()/materialize(), which bakes the current
+    value in and resets lastUpdate to the clock.
+
+Running aggregates (per terrain class k):
+    Until it saturates at 1.0, a decaying cell contributes
+    (lifeRatio - decayRate * lastUpdate) + decayRate * clock, so
+
+        sum_k(clock) = linearBase[k] + decayRate * clock * slopeCount[k] + saturatedCount[k]
+
+    write() removes a cell's old contribution and adds the new one.
+    Each decaying cell is also filed under the tick it will reach 1.0;
+    tick() moves those cells into saturatedCount. Reading a class sum or
+    the global mean is O(number of terrain classes).
+'''
+
+class CellStateStore:
+    UNINITIALIZED = -1
+
+    def __init__(self, worldWidth, worldHeight, staticTerrains=('water',)):
+        self.worldWidth = worldWidth
+        self.worldHeight = worldHeight
+        shape = (worldHeight, worldWidth)
+
+        self.lifeRatio = np.zeros(shape, dtype=np.float32)
+        self.terrainIds = np.full(shape, self.UNINITIALIZED, dtype=np.int16)
+        self.lastUpdate = np.zeros(shape, dtype=np.int32)
+        self.decays = np.zeros(shape, dtype=bool)
+        self.saturated = np.zeros(shape, dtype=bool)
+        self.saturationTick = np.full(shape, -1, dtype=np.int64)
+        self.flatIndex = np.arange(worldHeight * worldWidth).reshape(shape)
+
+        self.staticTerrains = set(staticTerrains)
+        self.terrainNames = []
+        self.terrainIndex = {}
+        self.count = 0
+
+        self.clock = 0
+        self.decayRate = 0.0
+
+        # per terrain class running sums, indexed by terrain id
+        self.cellCount = np.zeros(0)
+        self.linearBase = np.zeros(0)
+        self.slopeCount = np.zeros(0)
+        self.saturatedCount = np.zeros(0)
+        self.saturationBuckets = {}
+
+        # callbacks (rowStart, colStart, rowEnd, colEnd) fired after every write
+        self.listeners = []
+
+    def getTerrainId(self, terrainType):
+        # register terrain names on first sight so custom maps keep working
+        if terrainType not in self.terrainIndex:
+            self.terrainIndex[terrainType] = len(self.terrainNames)
+            self.terrainNames.append(terrainType)
+            for name in ('cellCount', 'linearBase', 'slopeCount', 'saturatedCount'):
+                setattr(self, name, np.append(getattr(self, name), 0.0))
+        return self.terrainIndex[terrainType]
+
+    def inBounds(self, row, col):
+        return 0 <= row < self.worldHeight and 0 <= col < self.worldWidth
+
+    def isInitialized(self, row, col):
+        return (self.inBounds(row, col) and
+                self.terrainIds[row, col] != self.UNINITIALIZED)
+
+    def initialize(self, row, col, terrainType):
+        if not self.inBounds(row, col):
+            return False
+        if self.terrainIds[row, col] != self.UNINITIALIZED:
+            return False
+        terrainId = self.getTerrainId(terrainType)
+        self.terrainIds[row, col] = terrainId
+        self.decays[row, col] = terrainType not in self.staticTerrains
+        self.saturated[row, col] = False
+        self.lifeRatio[row, col] = 0.0
+        self.lastUpdate[row, col] = self.clock
+        self.count += 1
+        self.cellCount[terrainId] += 1
+
+        rows, cols = np.array([row]), np.array([col])
+        mask = np.array([True])
+        self._accumulate(rows, cols, mask, 1)
+        self._scheduleSaturation(rows, cols, mask)
+        self._notify(rows, cols, mask)
+        return True
+
+    def initializeBlock(self, rows, cols, terrainIds):
+        """Initialize every still-uninitialized cell of a block from an array of terrain ids"""
+        new = (self.terrainIds[rows, cols] == self.UNINITIALIZED) & (terrainIds != self.UNINITIALIZED)
+        if not new.any():
+            return 0
+        isStatic = np.array([name in self.staticTerrains for name in self.terrainNames], dtype=bool)
+        newIds = terrainIds[new]
+
+        self.terrainIds[rows, cols] = np.where(new, terrainIds, self.terrainIds[rows, cols])
+        self.decays[rows, cols] = np.where(new, ~isStatic[np.maximum(terrainIds, 0)], self.decays[rows, cols])
+        self.saturated[rows, cols] &= ~new
+        self.lifeRatio[rows, cols] = np.where(new, 0.0, self.lifeRatio[rows, cols])
+        self.lastUpdate[rows, cols] = np.where(new, self.clock, self.lastUpdate[rows, cols])
+        added = int(new.sum())
+        self.count += added
+        self.cellCount += np.bincount(newIds, minlength=len(self.terrainNames))
+
+        self._accumulate(rows, cols, new, 1)
+        self._scheduleSaturation(rows, cols, new)
+        self._notify(rows, cols, new)
+        return added
+
+    def terrainAt(self, row, col):
+        if not self.isInitialized(row, col):
+            return None
+        return self.terrainNames[self.terrainIds[row, col]]
+
+    def initializedMask(self):
+        return self.terrainIds != self.UNINITIALIZED
+
+    def terrainMask(self, terrainType):
+        if terrainType not in self.terrainIndex:
+            return np.zeros(self.terrainIds.shape, dtype=bool)
+        return self.terrainIds == self.terrainIndex[terrainType]
+
+    #====Lazy evaluation====
+    def projected(self, rows=slice(None), cols=slice(None)):
+        """Stored value plus linear decay since lastUpdate, not clamped"""
+        elapsed = (self.clock - self.lastUpdate[rows, cols]).astype(np.float32)
+        return self.lifeRatio[rows, cols] + self.decayRate * elapsed * self.decays[rows, cols]
+
+    def current(self, rows=slice(None), cols=slice(None)):
+        """Current lifeRatio for a block of cells (uninitialized cells read as 0)"""
+        return np.minimum(1.0, self.projected(rows, cols))
+
+    def write(self, rows, cols, values, mask=None):
+        """Store values for a block of cells as of the current clock"""
+        initialized = self.terrainIds[rows, cols] != self.UNINITIALIZED
+        mask = initialized if mask is None else (mask & initialized)
+        if not np.any(mask):
+            return
+        values = np.broadcast_to(values, mask.shape)
+
+        self._accumulate(rows, cols, mask, -1)
+        self.lifeRatio[rows, cols] = np.where(mask, values, self.lifeRatio[rows, cols])
+        self.lastUpdate[rows, cols] = np.where(mask, self.clock, self.lastUpdate[rows, cols])
+        self.saturated[rows, cols] = np.where(
+            mask, self.decays[rows, cols] & (values >= 1.0), self.saturated[rows, cols])
+        self._accumulate(rows, cols, mask, 1)
+        self._scheduleSaturation(rows, cols, mask)
+        self._notify(rows, cols, mask)
+
+    def materialize(self, rows=slice(None), cols=slice(None)):
+        self.write(rows, cols, self.current(rows, cols))
+
+    def tick(self):
+        """Advance the clock one step and retire cells that just reached 1.0"""
+        self.clock += 1
+        pending = self.saturationBuckets.pop(self.clock, None)
+        if not pending:
+            return
+
+        flat = np.concatenate(pending)
+        valid = ((self.saturationTick.flat[flat] == self.clock) &
+                 ~self.saturated.flat[flat] & self.decays.flat[flat])
+        flat = np.unique(flat[valid])
+        if len(flat):
+            rows, cols = np.unravel_index(flat, self.lifeRatio.shape)
+            self.write(rows, cols, 1.0)
+
+    def setDecayRate(self, rate):
+        # bake in decay at the old rate before the slope changes
+        self.materialize()
+        self.decayRate = rate
+        self.rebuildAggregates()
+
+    #====Running aggregates====
+    def _accumulate(self, rows, cols, mask, sign):
+        terrainIds = self.terrainIds[rows, cols][mask]
+        lifeRatio = self.lifeRatio[rows, cols][mask].astype(np.float64)
+        lastUpdate = self.lastUpdate[rows, cols][mask].astype(np.float64)
+        decays = self.decays[rows, cols][mask]
+        saturated = self.saturated[rows, cols][mask]
+
+        linear = ~saturated
+        base = np.where(linear, lifeRatio - self.decayRate * lastUpdate * decays, 0.0)
+        classes = len(self.terrainNames)
+        self.linearBase += sign * np.bincount(terrainIds, weights=base, minlength=classes)
+        self.slopeCount += sign * np.bincount(terrainIds, weights=linear & decays, minlength=classes)
+        self.saturatedCount += sign * np.bincount(terrainIds, weights=saturated, minlength=classes)
+
+    def _scheduleSaturation(self, rows, cols, mask):
+        pending = mask & self.decays[rows, cols] & ~self.saturated[rows, cols]
+        flat = self.flatIndex[rows, cols][pending]
+        if self.decayRate <= 0 or not len(flat):
+            self.saturationTick.flat[flat] = -1
+            return
+
+        lifeRatio = self.lifeRatio[rows, cols][pending].astype(np.float64)
+        ticks = self.clock + np.ceil((1.0 - lifeRatio) / self.decayRate - 1e-9).astype(np.int64)
+        ticks = np.maximum(ticks, self.clock + 1)
+
+        # only refile cells whose saturation tick actually moved
+        changed = ticks != self.saturationTick.flat[flat]
+        flat, ticks = flat[changed], ticks[changed]
+        self.saturationTick.flat[flat] = ticks
+        if not len(flat):
+            return
+
+        order = np.argsort(ticks, kind='stable')
+        flat, ticks = flat[order], ticks[order]
+        starts = np.flatnonzero(np.diff(ticks)) + 1
+        for group in np.split(np.arange(len(ticks)), starts):
+            self.saturationBuckets.setdefault(int(ticks[group[0]]), []).append(flat[group])
+
+    def rebuildAggregates(self):
+        """Recompute every running sum and saturation tick from the cell arrays"""
+        for name in ('linearBase', 'slopeCount', 'saturatedCount'):
+            getattr(self, name)[:] = 0.0
+        self.saturationBuckets = {}
+        self.saturationTick[:] = -1
+        mask = self.initializedMask()
+        everything = (slice(None), slice(None))
+        self._accumulate(*everything, mask, 1)
+        self._scheduleSaturation(*everything, mask)
+        for listener in self.listeners:
+            listener(0, 0, self.worldHeight, self.worldWidth)
+
+    def _notify(self, rows, cols, mask):
+        if not self.listeners:
+            return
+        if isinstance(rows, slice):
+            maskRows, maskCols = np.nonzero(mask)
+            rowIdx = maskRows + (rows.start or 0)
+            colIdx = maskCols + (cols.start or 0)
+        else:
+            rowIdx = np.broadcast_to(rows, mask.shape)[mask]
+            colIdx = np.broadcast_to(cols, mask.shape)[mask]
+        if not len(rowIdx):
+            return
+        bounds = (int(rowIdx.min()), int(colIdx.min()), int(rowIdx.max()) + 1, int(colIdx.max()) + 1)
+        for listener in self.listeners:
+            listener(*bounds)
+
+    def classSums(self):
+        """Current lifeRatio sum per terrain id"""
+        return self.linearBase + self.decayRate * self.clock * self.slopeCount + self.saturatedCount
+
+    def sumLifeRatio(self, excludeTerrain='water'):
+        """Return (sum of lifeRatio, cell count) over initialized cells"""
+        sums, counts = self.classSums(), self.cellCount
+        if excludeTerrain in self.terrainIndex:
+            keep = np.arange(len(self.terrainNames)) != self.terrainIndex[excludeTerrain]
+            sums, counts = sums[keep], counts[keep]
+        return float(sums.sum()), int(counts.sum())
+
+    def meanLifeRatio(self, excludeTerrain='water'):
+        total, count = self.sumLifeRatio(excludeTerrain)
+        return total / count if count > 0 else 0.0
+
+    def terrainClassStats(self):
+        """Return {terrain: {'mean': ..., 'count': ...}} from the running sums"""
+        sums = self.classSums()
+        return {name: {'mean': float(sums[i] / self.cellCount[i]) if self.cellCount[i] else 0.0,
+                       'count': int(self.cellCount[i])}
+                for i, name in enumerate(self.terrainNames)}
+
+    def _currentAt(self, row, col):
+        value = float(self.lifeRatio[row, col])
+        if self.decays[row, col]:
+            value += self.decayRate * (self.clock - int(self.lastUpdate[row, col]))
+        return min(1.0, value)
+
+    #====(row, col) accessors====
+    def get(self, pos, default=None):
+        row, col = pos
+        if not self.isInitialized(row, col):
+            return default
+        return self._currentAt(row, col)
+
+    def __contains__(self, pos):
+        return self.isInitialized(*pos)
+
+    def __getitem__(self, pos):
+        row, col = pos
+        if not self.isInitialized(row, col):
+            raise KeyError(pos)
+        return self._currentAt(row, col)
+
+    def __setitem__(self, pos, lifeRatio):
+        row, col = pos
+        if not self.isInitialized(row, col):
+            raise KeyError(pos)
+        self.write(np.array([row]), np.array([col]), lifeRatio)
+
+    def __len__(self):
+        return self.count
@@ -1,14 +1,13 @@
-from cmu_graphics import *
+from graphics import *
 import math
 import os
-from PIL import Image
 
 '''
 Character Sprite Image Creidt: https://www.sandromaglione.com/articles/pixel-art-top-down-game-sprite-design-and-animation
 '''
 
 class Character:
-    def __init__(self, worldWidth, worldHeight, cellWidth, cellHeight):
+    def __init__(self, worldWidth, worldHeight, cellWidth, cellHeight, loadSprites=True):
         self.worldWidth = worldWidth
         self.worldHeight = worldHeight
         self.cellWidth = cellWidth
@@ -28,7 +27,9 @@ class Character:
         }
 
         # Initialize sprites after setting up visual parameters
-        self._loadSprites()
+        self.sprites = {}
+        if loadSprites:
+            self._loadSprites()
         
         print(f"\nSprite initialization complete:")
         print(f"Sprite dictionary exists: {hasattr(self, 'sprites')}")
@@ -66,7 +67,7 @@ class Character:
         self.healingWave = {
             'isActive': False,
             'cooldown': 10,  
-            'lastUsed': 0,
+            'lastUsed': float('-inf'),  # sim time, ready from the start
             'healAmount': 0.05,
             'radius': 0,
             'maxRadius': math.sqrt(worldWidth**2 + worldHeight**2) * max(cellWidth, cellHeight),
@@ -319,12 +320,12 @@ class Character:
             
             try:
                 # Open image and preserve alpha channel
-                img = Image.open(path)
+                img = PILImage.open(path)
                 if img.mode != 'RGBA':
                     img = img.convert('RGBA')
                     
                 # Create a new RGBA image with transparent background
-                new_img = Image.new('RGBA', img.size, (0, 0, 0, 0))
+                new_img = PILImage.new('RGBA', img.size, (0, 0, 0, 0))
                 new_img.paste(img, (0, 0), img)
                 
                 self.sprites[direction] = CMUImage(new_img)
@@ -0,0 +1,172 @@
+import math
+import numpy as np
+from cell_state import CellStateStore
+from region_query import RegionQuery
+from world_chunks import ChunkManager
+from healing_engine import HealingEngine
+
+'''
+====Deterioration Model====
+Terrain health without any textures or graphics: the cell store, region
+queries, chunk scheduling and the character's healing footprint.
+TextureManagerOptimized builds its textures on top of this; headless
+simulations use it on its own.
+'''
+
+class DeteriorationModel:
+    def __init__(self, worldWidth=200, worldHeight=150, cellWidth=10, cellHeight=8):
+        # terrain settings
+        self.terrainAttributes = {
+            "path_rocks": {"updateFrequency": 10, "maxLife": 500},
+            "pavement": {"updateFrequency": 10, "maxLife": 300},
+            "dirt": {"updateFrequency": 10, "maxLife": 200},
+            "water": {"updateFrequency": 10, "maxLife": 300},
+            "tall_grass": {"updateFrequency": 10, "maxLife": 100},
+            "tiny_leaves": {"updateFrequency": 10, "maxLife": 100},
+            "woodtile": {"updateFrequency": 10, "maxLife": 400},
+            "snow": {"updateFrequency": 10, "maxLife": 100},
+            "sand": {"updateFrequency": 10, "maxLife": 500},
+            "brick": {"updateFrequency": 10, "maxLife": 300}
+        }
+        self.cellStates = CellStateStore(worldWidth, worldHeight)
+        self.regionQuery = RegionQuery(self.cellStates)
+        self.chunks = ChunkManager(self.cellStates)
+        self.healing = HealingEngine(self.cellStates, cellWidth, cellHeight)
+        self.deteriorationRate = 0.005
+        # only cells under active healing are stepped; the rest decay in closed form on read
+        self.lazyDeterioration = True
+        self.healingRate = 0.015
+        self.healingKernels = {}
+        self.kernelSubsteps = 4
+
+    @property
+    def updateCounter(self):
+        return self.cellStates.clock
+
+    @property
+    def deteriorationRate(self):
+        return self.cellStates.decayRate
+
+    @deteriorationRate.setter
+    def deteriorationRate(self, rate):
+        self.cellStates.setDecayRate(rate)
+
+    def setTerrainGrid(self, grid):
+        self.chunks.setTerrainGrid(grid)
+
+    def scheduleChunks(self, viewRegions, healingRegions=()):
+        if self.lazyDeterioration:
+            # nothing is stepped, so there is no active/dormant split to keep
+            self.chunks.explore(viewRegions)
+            return set(), set()
+        return self.chunks.schedule(viewRegions, healingRegions)
+
+    def initializeCellState(self, row, col, terrainType):
+        self.cellStates.initialize(row, col, terrainType)
+        return self.cellStates.get((row, col))
+
+    def _checkTerrainAttributes(self):
+        for terrain in self.cellStates.terrainNames:
+            if terrain not in self.terrainAttributes:
+                print(f"Warning: Missing terrain attributes for {terrain}, using defaults")
+                self.terrainAttributes[terrain] = {"updateFrequency": 10, "maxLife": 300}
+
+    def getHealingKernel(self, radius, cellWidth, cellHeight, subX=0, subY=0):
+        """Radial falloff (1 at the centre, 0 at radius) around the character's cell.
+        subX/subY pick where inside its cell the character stands."""
+        key = (radius, cellWidth, cellHeight, subX, subY)
+        if key not in self.healingKernels:
+            if len(self.healingKernels) >= 256:
+                self.healingKernels.clear()
+
+            # character offset from the centre of its own cell
+            offsetX = ((subX + 0.5) / self.kernelSubsteps - 0.5) * cellWidth
+            offsetY = ((subY + 0.5) / self.kernelSubsteps - 0.5) * cellHeight
+            reachCols = int(math.ceil(radius / cellWidth)) + 1
+            reachRows = int(math.ceil(radius / cellHeight)) + 1
+
+            dx = np.arange(-reachCols, reachCols + 1) * cellWidth - offsetX
+            dy = np.arange(-reachRows, reachRows + 1) * cellHeight - offsetY
+            distance = np.sqrt(dx[np.newaxis, :] ** 2 + dy[:, np.newaxis] ** 2)
+            falloff = np.where(distance <= radius, 1 - distance / radius, 0.0)
+            self.healingKernels[key] = (reachRows, reachCols, falloff.astype(np.float32))
+        return self.healingKernels[key]
+
+    def getHealingFootprint(self, character):
+        """Return (rowSlice, colSlice, falloff) of the character's restoration area, clipped to the world"""
+        charX, charY = character.getPosition()
+        cellWidth, cellHeight = character.cellWidth, character.cellHeight
+        charCol = int(charX // cellWidth)
+        charRow = int(charY // cellHeight)
+        subX = min(self.kernelSubsteps - 1, int((charX / cellWidth - charCol) * self.kernelSubsteps))
+        subY = min(self.kernelSubsteps - 1, int((charY / cellHeight - charRow) * self.kernelSubsteps))
+
+        reachRows, reachCols, falloff = self.getHealingKernel(
+            character.getRestorationRadius(), cellWidth, cellHeight, subX, subY)
+
+        top, left = charRow - reachRows, charCol - reachCols
+        bottom, right = top + falloff.shape[0], left + falloff.shape[1]
+        rowStart, colStart = max(0, top), max(0, left)
+        rowEnd = min(self.cellStates.worldHeight, bottom)
+        colEnd = min(self.cellStates.worldWidth, right)
+        if rowStart >= rowEnd or colStart >= colEnd:
+            return None
+
+        falloff = falloff[rowStart - top:rowEnd - top, colStart - left:colEnd - left]
+        return slice(rowStart, rowEnd), slice(colStart, colEnd), falloff
+
+    def calculateGlobalDeterioration(self):
+        # O(1): read from the store's running per-terrain sums
+        return self.cellStates.meanLifeRatio(excludeTerrain='water')
+
+    def getRegionStats(self, startRow, startCol, endRow, endCol, fill=None, excludeWater=False):
+        """Mean/min/max lifeRatio over [startRow, endRow) x [startCol, endCol), or None if empty"""
+        return self.regionQuery.rectStats(startRow, startCol, endRow, endCol,
+                                          fill=fill, excludeStatic=excludeWater)
+
+    def getBoxMeans(self, rows, cols, radius=1, fill=None, excludeWater=False):
+        """Mean lifeRatio of the box around each of many cells at once (array in, array out)"""
+        return self.regionQuery.boxMeans(rows, cols, radius, fill=fill, excludeStatic=excludeWater)
+
+    def getDiskStats(self, row, col, radius, fill=None, excludeWater=False):
+        """Mean/min/max lifeRatio over cells within radius (in cells) of (row, col)"""
+        return self.regionQuery.diskStats(row, col, radius, fill=fill, excludeStatic=excludeWater)
+
+    def applyGlobalHealing(self, healAmount):
+        """Apply percentage-based healing to all deteriorated cells"""
+        # healAmount is treated as a percentage (0.2 = 20%) of current deterioration
+        return self.healing.healFraction(healAmount)
+
+    def updateDeterioration(self, character=None):
+        states = self.cellStates
+        states.tick()
+        self._checkTerrainAttributes()
+
+        # healing is the only non-linear change, so only its footprint is stepped eagerly
+        if character:
+            footprint = self.getHealingFootprint(character)
+            if footprint:
+                rows, cols, falloff = footprint
+                healing = self.healingRate * character.strength * falloff
+                healed = np.clip(states.projected(rows, cols) - healing, 0.0, 1.0)
+                # water doesn't deteriorate or heal
+                states.write(rows, cols, healed, mask=states.decays[rows, cols])
+
+        if not self.lazyDeterioration:
+            # dormant chunks are left to catch up in closed form when they wake
+            self.chunks.materializeActive()
+
+    def setDeteriorationRate(self, rate):
+        self.deteriorationRate = max(0.0, min(0.01, rate))
+
+    def setHealingRate(self, rate):
+        self.healingRate = max(0.0, min(0.02, rate))
+
+    def getTerrainStats(self, row, col):
+        if (row, col) in self.cellStates:
+            return {
+                'lifeRatio': self.cellStates[row, col],
+                'terrain': self.cellStates.terrainAt(row, col),
+                'lastUpdate': int(self.cellStates.lastUpdate[row, col])
+            }
+        return None
@@ -1,9 +1,8 @@
-from cmu_graphics import *
+from graphics import *
 import random
 import math
 import time
 import os
-from PIL import Image
 
 class Equipment:
     TYPES = {
@@ -52,12 +51,12 @@ class Equipment:
                     continue
                 
                 # Open image and preserve alpha channel
-                img = Image.open(path)
+                img = PILImage.open(path)
                 if img.mode != 'RGBA':
                     img = img.convert('RGBA')
                 
                 # Create a new RGBA image with transparent background
-                new_img = Image.new('RGBA', img.size, (0, 0, 0, 0))
+                new_img = PILImage.new('RGBA', img.size, (0, 0, 0, 0))
                 new_img.paste(img, (0, 0), img)
                 
                 cls.sprites[eq_type] = CMUImage(new_img)
@@ -1,11 +1,10 @@
 from cmu_graphics import *
-import random
+from simulation import Simulation
 from texture_manager import TextureManagerOptimized
-from character import Character
 from mini_map import MiniMap
-from map_editor import MapEditor
-from tree import Tree
-import time
+from tree_impostor import TreeImpostorCache
+from terrain_tiles import TerrainTileCache
+from texture_warmup import TextureWarmup
 import math
 from equipment import Equipment
 
@@ -26,33 +25,21 @@ The following features were implemented with Claude 3.5's help:
    - Screen coordinate conversion
 
 3. Helper Methods:
-   - Visibility checking (_isValidCell, _isTreeVisible)
+   - Visibility checking (_isValidCell)
    - World-to-screen coordinate conversion
    - Error handling implementation
 '''
 
-class Game:
+class Game(Simulation):
+    terrainModelClass = TextureManagerOptimized
+    headless = False
+    treeWorkers = 2
+    # on-screen tree size in pixels for (full detail, reduced detail); smaller trees are blobs
+    treeLodThresholds = (150, 60)
+    # threads baking textures in the background on start and zoom; 0 bakes them up front
+    textureWorkers = 2
+
     def __init__(self, customMap=None, isInfiniteMode=False):
-        self.isInfiniteMode = isInfiniteMode
-        self.statistics = {
-            'deterioration': [],
-            'power': [],
-            'speed': [],
-            'healingRadius': [],
-            'timestamps': []
-        }
-        self.windowWidth = 800
-        self.windowHeight = 600
-        self.worldWidth = 200
-        self.worldHeight = 150
-        self.baseCellWidth = 10
-        self.baseCellHeight = 8
-        
-        self.cameraX = self.cameraY = 0
-        self.zoomLevel = 8.0
-        self.minZoom = 5.0
-        self.maxZoom = 10.0
-        
         self.terrainTypes = {
             'water': 'blue',
             'dirt': 'brown',
@@ -63,32 +50,7 @@ class Game:
             'bigleaves': 'forestGreen',
             'tiny_leaves': 'lightGreen'
         }
-        
-        self.textureManager = TextureManagerOptimized()
-        if not customMap:
-            raise Exception("Need a map to start game!")
-        self.grid = customMap
-        
-        # Initialize equipment list and spawn density
-        self.equipment = []
-        self.equipmentDensity = 0.05
-        
-        # Create character with adjusted initial values
-        self.character = Character(self.worldWidth, self.worldHeight, 
-                                self.baseCellWidth, self.baseCellHeight)
-        self.character.strength = 0.1
-        self.character.restorationRadiusMultiplier = 5
-        self.character.healingWave['healAmount'] = 0.05
-        
-        try:
-            # Spawn character on high ground
-            self._spawnCharacter()
-        except Exception as e:
-            print(f"Failed to spawn character: {e}")
-            raise Exception("Cannot start game: No valid spawn position found")
-        
-        # Spawn equipment
-        self._spawnEquipment()
+        super().__init__(customMap, isInfiniteMode)
         
         self.miniMapState = 'TERRAIN'  # Instead of 'DETERIORATION'
         self.miniMap = MiniMap(
@@ -102,90 +64,26 @@ class Game:
         )
         self.miniMap.showDeterioration = True
         self.miniMap.updateGrid(self.grid)
-        self.updateCamera()
         
-        self.gameOver = False
-        self.gameWon = False
-        self.startTime = time.time()
-        self.gameTime = 60
         self.showGameOverMessage = False
-        
-        self.treeDensity = 0.05
-        self.trees = []
         self.showDebugInfo = True
-        self._spawnTrees()
         
-        self.inventory = {
-            'radius': {'count': 0, 'total_bonus': 0},
-            'power': {'count': 0, 'total_bonus': 0},
-            'speed': {'count': 0, 'total_bonus': 0},
-            'burst': {'count': 0}
-        }
-        self.healingBursts = []  # List to track active burst animations
+        # one cached image per tree stage instead of a shape per branch/leaf
+        self.treeImpostors = TreeImpostorCache(lodThresholds=self.treeLodThresholds)
         
-        # Load equipment sprites
-        Equipment.loadSprites()
-
-    def _spawnTrees(self):
-        ok_terrain = {'dirt', 'tiny_leaves', 'tall_grass'}
+        # land is drawn as 8x8-cell composites rebuilt only when their cells change
+        self.terrainTiles = TerrainTileCache(self.textureManager, self.baseCellWidth, self.baseCellHeight)
+        self.terrainTiles.setGrid(self.grid)
         
-        # Clear existing trees
-        self.trees = []
+        # every deterioration level of the map's terrains, baked for the current cell size
+        self.textureWarmup = TextureWarmup(self.textureManager, self.textureWorkers) if self.textureWorkers else None
+        # with workers a missing texture is queued and drawn flat meanwhile instead of built inline
+        self.textureManager.asyncMisses = self.textureWarmup is not None
+        self.textureManager.setFallbackColors(self.terrainTypes)
+        self.prebakeTextures()
         
-        # Only spawn trees within valid bounds
-        for row in range(min(self.worldHeight, len(self.grid))):
-            for col in range(min(self.worldWidth, len(self.grid[row]))):
-                try:
-                    cell = self.grid[row][col]
-                    if isinstance(cell, dict) and cell.get('terrain') in ok_terrain:
-                        if random.random() < self.treeDensity:
-                            x = (col + 0.5) * self.baseCellWidth
-                            y = (row + 0.5) * self.baseCellHeight
-                            self.trees.append((Tree(x, y), (row, col)))
-                except Exception as e:
-                    print(f"Tree spawn failed at {row}, {col}: {e}")
-
-    def getSurroundingTerrainHealth(self, worldX, worldY):
-        # Convert world coordinates to grid position
-        col = int(worldX / self.baseCellWidth)
-        row = int(worldY / self.baseCellHeight)
-        health = []
-
-        # Check each neighboring cell
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                r, c = row + dy, col + dx
-                
-                # Skip cells outside the world bounds
-                if not (0 <= r < self.worldHeight and 0 <= c < self.worldWidth):
-                    continue
-                    
-                # Get cell's current health
-                key = self.textureManager.getCellKey(r, c)
-                state = self.textureManager.cellStates.get(key)
-                health.append(state['lifeRatio'] if state else 1.0)
-
-        return health
-
-    def getVisibleCells(self):
-        # Add extra cells around the visible area
-        PADDING = 5
-        
-        # Find top-left corner of visible area
-        startCol = int(self.cameraX / self.baseCellWidth)
-        startRow = int(self.cameraY / self.baseCellHeight)
-        
-        # Calculate how many cells fit on screen at current zoom
-        cellsWide = int(self.windowWidth / (self.baseCellWidth * self.zoomLevel))
-        cellsHigh = int(self.windowHeight / (self.baseCellHeight * self.zoomLevel))
-        
-        # Add padding and clamp to world bounds
-        startCol = max(0, startCol - PADDING)
-        startRow = max(0, startRow - PADDING)
-        endCol = min(self.worldWidth, startCol + cellsWide + PADDING * 2)
-        endRow = min(self.worldHeight, startRow + cellsHigh + PADDING * 2)
-        
-        return startRow, startCol, endRow, endCol
+        # Load equipment sprites
+        Equipment.loadSprites()
 
     def drawCell(self, row, col):
         # Convert grid position to world coordinates
@@ -202,12 +100,13 @@ class Game:
                     screenY + height > 0 and screenY < self.windowHeight)
         
         if isVisible:
-            # Get cell data and texture
+            # Get cell data and texture (baked at a snapped size, stretched to the cell)
             cellData = self.grid[row][col]
+            textureWidth, textureHeight = self.textureManager.getTextureSize(self.zoomLevel)
             texture, health = self.textureManager.getTextureForCell(
                 row, col, 
                 cellData['terrain'], 
-                width, height,
+                textureWidth, textureHeight,
                 character=self.character
             )
             
@@ -255,6 +154,13 @@ class Game:
                 self.drawEndGameGraph()
                 return
                 
+            # Render between the last two sim steps
+            self.updateCamera(self.getRenderCharacterPosition())
+
+            # Install textures the warm-up finished since the last frame
+            if self.textureWarmup:
+                self.textureWarmup.collect()
+
             # Get visible area
             visibleArea = self.getVisibleCells()
             startRow, startCol, endRow, endCol = visibleArea
@@ -262,8 +168,8 @@ class Game:
             # Draw terrain
             self._drawVisibleTerrain(startRow, startCol, endRow, endCol)
             
-            # Draw equipment first (under trees and character)
-            for equip in self.equipment:
+            # Draw equipment first (under trees and character), only what's on screen
+            for equip in self.getEquipmentInView(startRow, startCol, endRow, endCol):
                 if not equip.collected:
                     equip.draw(self)
                     
@@ -274,7 +180,7 @@ class Game:
             self._drawHealingBursts()
             
             # Draw character
-            charPos = self.character.getPosition()
+            charPos = self.getRenderCharacterPosition()
             screenPos = self.worldToScreen(*charPos)
             self.character.draw(*screenPos, self.zoomLevel)
             
@@ -286,42 +192,56 @@ class Game:
             print(f"Error in redrawGame: {e}")
 
     def _drawVisibleTerrain(self, startRow, startCol, endRow, endCol):
-        # Draw visible cells
-        for row in range(startRow, endRow):
-            for col in range(startCol, endCol):
-                if self._isValidCell(row, col):
-                    self.drawCell(row, col)
+        # Land comes from the composited tiles; animated water is still drawn per cell
+        self.terrainTiles.draw(self, startRow, startCol, endRow, endCol)
+        for row, col in self.terrainTiles.getWaterCells(startRow, startCol, endRow, endCol):
+            self.drawCell(row, col)
+        
+        if self.showDebugInfo:
+            self._drawHealthOverlays(startRow, startCol, endRow, endCol)
+    
+    def _drawHealthOverlays(self, startRow, startCol, endRow, endCol):
+        # water cells get theirs from drawCell
+        width = int(self.baseCellWidth * self.zoomLevel)
+        height = int(self.baseCellHeight * self.zoomLevel)
+        for row in range(max(0, startRow), min(self.worldHeight, endRow)):
+            for col in range(max(0, startCol), min(self.worldWidth, endCol)):
+                if self.grid[row][col]['terrain'] == 'water':
+                    continue
+                screenX, screenY = self.worldToScreen(col * self.baseCellWidth, row * self.baseCellHeight)
+                if (screenX + width > 0 and screenX < self.windowWidth and
+                        screenY + height > 0 and screenY < self.windowHeight):
+                    health = self.textureManager.cellStates.get((row, col), 0.0)
+                    self._drawHealthOverlay(screenX, screenY, width, height, health)
 
     def _updateAndDrawTrees(self, startRow, startCol, endRow, endCol):
 
         treesToDraw = []
+        self.collectTreeGeometry()
+        self.treeImpostors.beginFrame()
+        
+        # Range query on the tree index instead of testing every tree
+        trees = self.getTreesInRange(startRow, startCol, endRow, endCol)
+        
+        # trees that haven't had an update yet get their health in one batch
+        self.updateTreeHealth([tree for tree in trees if tree.needsUpdate])
         
-        for tree, position in self.trees:
-            treeRow, treeCol = position
+        for tree in trees:
+            # geometry is built in the background; never wait for it here
+            self.ensureTreeGenerated(tree)
             
-
-            if self._isTreeVisible(treeRow, treeCol, startRow, startCol, endRow, endCol):
-                tree.ensureGenerated()
-                
-                # Update tree health if needed
-                if tree.needsUpdate:
-                    health = self.getSurroundingTerrainHealth(tree.baseX, tree.baseY)
-                    tree.updateTreeLife(health)
-                    tree.needsUpdate = False
-                
-                # Convert world position to screen coordinates
-                screenPos = self.worldToScreen(tree.baseX, tree.baseY)
-                treesToDraw.append((tree, *screenPos))
-            else:
-                tree.needsUpdate = True
+            # Convert world position to screen coordinates
+            screenPos = self.worldToScreen(tree.baseX, tree.baseY)
+            treesToDraw.append((tree, *screenPos))
         
         # Draw trees in order of y-position (back to front)
+        # tier (full/reduced/blob/placeholder) is picked per tree from its on-screen size
         for tree, screenX, screenY in sorted(treesToDraw, key=lambda t: t[2]):
-            tree.drawTree(self)
+            self.treeImpostors.drawTree(tree, self)
 
     def _drawPlayerAndUI(self):
         # Draw equipment first (under the player)
-        for equip in self.equipment:
+        for equip in self.getEquipmentInView(*self.getVisibleCells()):
             if not equip.collected:
                 equip.draw(self)
         
@@ -333,32 +253,12 @@ class Game:
         self.drawUI()
         self.drawMiniMap()
 
-    def _isValidCell(self, row, col):
-        return 0 <= row < self.worldHeight and 0 <= col < self.worldWidth
-
-    def _isTreeVisible(self, treeRow, treeCol, startRow, startCol, endRow, endCol):
-        return (startCol-1 <= treeCol <= endCol+1 and 
-                startRow-1 <= treeRow <= endRow+1)
-    
-    def endGame(self):
-        """Mark game as over without drawing immediately"""
-        self.gameOver = True
-
     def displayStatisticsGraph(self):
         # Implement the logic to display the statistics graph
         # This could involve drawing the graph on the screen using the collected statistics
         print("Displaying statistics graph...")
         # Example: Plotting the statistics using a library or custom drawing logic
 
-    def updateCamera(self):
-        charX, charY = self.character.getPosition()
-        self.cameraX = charX - (self.windowWidth / (2 * self.zoomLevel))
-        self.cameraY = charY - (self.windowHeight / (2 * self.zoomLevel))
-
-    def setZoom(self, newZoom):
-        self.zoomLevel = max(self.minZoom, min(self.maxZoom, newZoom))
-        self.updateCamera()
-    
     def drawEndGameGraph(self):
         # Clear the screen
         drawRect(0, 0, self.windowWidth, self.windowHeight, fill='black')
@@ -517,9 +417,21 @@ class Game:
                      fill='white', bold=True,
                      size=14)
 
+        if self.showDebugInfo:
+            tiers = self.treeImpostors.tierCounts  # trees are drawn before the UI
+            drawLabel(f"Trees full/reduced/blob/pending: {tiers['full']}/{tiers['reduced']}/"
+                      f"{tiers['blob']}/{tiers['placeholder']}",
+                     padding, padding + boxHeight + 15,
+                     fill='white', align='left', size=12)
+
+        if self.textureWarmup and not self.textureWarmup.isComplete():
+            drawLabel(f"Loading textures {int(self.textureWarmup.getProgress() * 100)}%",
+                     padding, padding + boxHeight + 32,
+                     fill='white', align='left', size=12)
+
         # Draw timer only in normal mode
         if not self.isInfiniteMode:
-            elapsedTime = time.time() - self.startTime
+            elapsedTime = self.simTime - self.startTime
             remainingTime = max(0, self.gameTime - elapsedTime)
             minutes = int(remainingTime // 60)
             seconds = int(remainingTime % 60)
@@ -535,15 +447,9 @@ class Game:
                      fill=timerColor, bold=True, size=24)
 
         # Draw global deterioration bar
-        totalCells = 0
-        deterioratedCells = 0
-        for key, cell in self.textureManager.cellStates.items():
-            if cell['terrain'] != 'water':
-                totalCells += 1
-                deterioratedCells += cell['lifeRatio']
+        deteriorationRatio = self.getCurrentDeterioration()
 
-        if totalCells > 0:
-            deteriorationRatio = deterioratedCells / totalCells
+        if len(self.textureManager.cellStates) > 0:
             barWidth = 200
             barHeight = 20
             barX = self.windowWidth - barWidth - 20
@@ -591,15 +497,6 @@ class Game:
         abilityY = startY + slotSize/2
         self._drawAbilityIcon(abilityX, abilityY, abilitySize)
 
-        # Update game over conditions
-        if not self.isInfiniteMode:
-            if deteriorationRatio >= 0.8:
-                self.gameOver = True
-                self.gameWon = False
-            elif remainingTime <= 0:
-                self.gameOver = True
-                self.gameWon = (deteriorationRatio < 0.8)  # Win if under 80% deterioration when time runs out
-        
         # Draw game over screen if needed
         if self.gameOver:
             self._drawGameOverScreen()
@@ -681,7 +578,7 @@ class Game:
                     borderWidth=2)
         
         # Cooldown overlay
-        currentTime = time.time()
+        currentTime = self.simTime
         if not self.character.canUseHealingWave(currentTime):
             cooldown = self.character.getHealingWaveCooldown(currentTime)
             cooldownRatio = cooldown / self.character.healingWave['cooldown']
@@ -746,40 +643,6 @@ class Game:
         if self.gameOver:
             self.drawEndGameGraph()
 
-    def emitHealingWave(self):
-        currentTime = time.time()
-        if self.character.canUseHealingWave(currentTime):
-            # Create healing burst effect
-            self.healingBursts.append({
-                'x': self.character.position['x'],
-                'y': self.character.position['y'],
-                'currentRadius': 0,
-                'maxRadius': self.character.healingWave['maxRadius'],
-                'startTime': currentTime,
-                'duration': 1.0,
-                'color': 'lightGreen',
-                'type': 'wave',
-                'healAmount': 0.2,
-                'baseOpacity': 20
-            })
-            
-            # Store the current deterioration level before healing
-            currentDet = self.getCurrentDeterioration()
-            
-            # Apply healing through texture manager
-            self.textureManager.applyGlobalHealing(0.2)
-            
-            # Update statistics after healing (if in infinite mode)
-            if self.isInfiniteMode:
-                self.statistics['deterioration'].append(self.getCurrentDeterioration())
-                self.statistics['timestamps'].append(currentTime - self.startTime)
-            
-            # Start cooldown
-            self.character.healingWave['lastUsed'] = currentTime
-            return True
-        return False
-
-
     def drawMiniMap(self):
         if self.miniMapState != 'OFF' and self.miniMap:
             viewport = self.getVisibleCells()
@@ -814,11 +677,30 @@ class Game:
             self.miniMap = minimap
         self.miniMap.updateGrid(self.grid)
 
-    def setCustomGrid(self, newGrid):
-        if len(newGrid) == self.worldHeight and len(newGrid[0]) == self.worldWidth:
-            self.grid = newGrid
-            self.miniMap.updateGrid(self.grid)
-            self._spawnTrees()  # Regenerate trees when grid changes
+    def close(self):
+        super().close()
+        if self.textureWarmup:
+            self.textureWarmup.shutdown()
+            self.textureWarmup = None
+            # nothing is left to bake misses in the background
+            self.textureManager.asyncMisses = False
+
+    def setZoom(self, newZoom):
+        super().setZoom(newZoom)
+        self.prebakeTextures()
+
+    def prebakeTextures(self):
+        """Bake the textures of the map's terrains for the cell size at the current zoom,
+        in the background when there are texture workers"""
+        width, height = self.textureManager.getTextureSize(self.zoomLevel)
+        self.textureManager.setCellSize(width, height)
+        terrainTypes = {cell['terrain'] for row in self.grid for cell in row}
+        if self.textureWarmup:
+            self.textureWarmup.start(terrainTypes, width, height)
+            return
+        self.textureManager.prebakeLadders(width, height, terrainTypes)
+        if 'water' in terrainTypes and 'water' in self.textureManager.textures:
+            self.textureManager.getWaterFrames(width, height)
 
     def worldToScreen(self, worldX, worldY):
         screenX = (worldX - self.cameraX) * self.zoomLevel
@@ -830,47 +712,15 @@ class Game:
         worldY = (screenY / self.zoomLevel) + self.cameraY
         return worldX, worldY
 
+    def setCustomGrid(self, newGrid):
+        if super().setCustomGrid(newGrid):
+            self.miniMap.updateGrid(self.grid)
+            self.terrainTiles.setGrid(self.grid)
+            self.prebakeTextures()
+
     def toggleDebugInfo(self):
         self.showDebugInfo = not self.showDebugInfo
 
-#====Section debugged by Claude 3.5, very complex, mostly attempted to be written by me, but some details added by Claude====
-    def update(self):
-        """Update game state including texture deterioration and trees"""
-        startRow, startCol, endRow, endCol = self.getVisibleCells()
-        
-        # Check for equipment collection
-        self._checkEquipmentCollection()
-        
-        # Only update terrain in and around visible area
-        padding = 2
-        for row in range(max(0, startRow-padding), min(self.worldHeight, endRow+padding)):
-            for col in range(max(0, startCol-padding), min(self.worldWidth, endCol+padding)):
-                try:
-                    cellData = self.grid[row][col]
-                    self.textureManager.initializeCellState(row, col, cellData['terrain'])
-                except Exception as e:
-                    print(f"Error initializing cell ({row}, {col}): {e}")
-        
-        self.textureManager.updateDeterioration(self.character)
-        
-        # Update healing effects
-        self._updateHealingEffects()
-        
-        # Update trees in visible area
-        for tree, (treeRow, treeCol) in self.trees:
-            if (startCol-1 <= treeCol <= endCol+1 and 
-                startRow-1 <= treeRow <= endRow+1):
-                if not tree.isGenerated:
-                    tree.ensureGenerated()
-                surroundingRatios = self.getSurroundingTerrainHealth(tree.baseX, tree.baseY)
-                tree.updateTreeLife(surroundingRatios)
-                tree.needsUpdate = False
-            else:
-                tree.needsUpdate = True
-                tree.isGenerated = False
-                tree.branches = []
-                tree.leaves = []
-#====Section debugged by Claude 3.5, very complex, mostly attempted to be written by me, but some details added by Claude====
     def debugTrees(self):
         """Print info about tree positions and visibility for debugging"""
         # Get current viewport bounds
@@ -886,181 +736,39 @@ class Game:
         # Track visible trees
         treesInView = 0
         
-        # Check each tree
-        for tree in self.trees:
+        # Trees in view (with 1-cell padding) straight from the index
+        for tree in self.getTreesInRange(startRow, startCol, endRow, endCol):
             # Convert tree position to grid coordinates
             gridX = int(tree.baseX / self.baseCellWidth)
             gridY = int(tree.baseY / self.baseCellHeight)
             
-            # Check if tree is in view (with 1-cell padding)
-            if (startCol-1 <= gridX <= endCol+1 and 
-                startRow-1 <= gridY <= endRow+1):
-                
-                # Get screen position for debugging
-                screenPos = self.worldToScreen(tree.baseX, tree.baseY)
-                
-                # Print tree info
-                print(f"Tree {treesInView + 1}:")
-                print(f"  Grid: ({gridY}, {gridX})")
-                print(f"  World: ({tree.baseX:.1f}, {tree.baseY:.1f})")
-                print(f"  Screen: ({screenPos[0]:.1f}, {screenPos[1]:.1f})")
-                
-                treesInView += 1
-        
-        print(f"\nTrees currently visible: {treesInView}")
-
-    def isTerrainWalkable(self, worldX, worldY):
-        # Convert world coordinates to grid position
-        col = int(worldX / self.baseCellWidth)
-        row = int(worldY / self.baseCellHeight)
-        
-        # Check bounds
-        if not self._isValidCell(row, col):
-            return False
-        
-        # Check if water
-        cellData = self.grid[row][col]
-        if cellData['terrain'] == 'water':
-            return False
-        
-        # Check deterioration level
-        key = self.textureManager.getCellKey(row, col)
-        state = self.textureManager.cellStates.get(key)
-        if state and state['lifeRatio'] >= 0.8:
-            return False
-        
-        return True
-
-    def _spawnEquipment(self):
-        """Spawn equipment on valid terrain (not water)"""
-        self.equipment = []  # Clear existing equipment
-        ok_terrain = {'dirt', 'tall_grass', 'path_rocks'}
-        
-        # Adjust equipment density for infinite mode
-        density = self.equipmentDensity * 1.5 if self.isInfiniteMode else self.equipmentDensity
-        
-        for row in range(self.worldHeight):
-            for col in range(self.worldWidth):
-                try:
-                    cell = self.grid[row][col]
-                    if cell['terrain'] in ok_terrain and random.random() < density:
-                        x = (col + 0.5) * self.baseCellWidth
-                        y = (row + 0.5) * self.baseCellHeight
-                        self.equipment.append(Equipment(x, y))
-                        print(f"Spawned equipment at ({row}, {col})")
-                except Exception as e:
-                    print(f"Equipment spawn failed at {row}, {col}: {e}")
-        
-        print(f"Total equipment spawned: {len(self.equipment)}")
-
-    def updateGame(self, dt):
-        if not self.gameOver:
-            # Remove statistics tracking from here since it's already in update()
-            if not self.isInfiniteMode:
-                remainingTime = self.gameTime - (time.time() - self.startTime)
-                if remainingTime <= 0:
-                    self.gameOver = True
-
-    def _checkEquipmentCollection(self):
-        charX, charY = self.character.getPosition()
-        char_size = self.character.visual['baseSize']
-        
-        for equip in self.equipment[:]:
-            if not equip.collected:
-                dx = charX - equip.x
-                dy = charY - equip.y
-                
-                if dx*dx + dy*dy < (char_size * char_size):
-                    try:
-                        equip_type = equip.type
-                        bonuses = equip.getBonuses()
-                        
-                        equip.collected = True
-                        if equip in self.equipment:
-                            self.equipment.remove(equip)
-                        
-                        if equip_type == 'burst':
-                            self._applyBurstHeal(equip.x, equip.y, bonuses)
-                        else:
-                            if equip_type in self.inventory:
-                                self.inventory[equip_type]['count'] += 1
-                                if equip_type == 'radius':
-                                    # Ensure the radius bonus is applied correctly
-                                    bonus = bonuses.get('radius_bonus', 1.0)  # Default bonus if not specified
-                                    self.character.restorationRadiusMultiplier += bonus
-                                    self.inventory[equip_type]['total_bonus'] += bonus
-                                elif equip_type == 'power':
-                                    bonus = bonuses.get('strength_bonus', 0.75)
-                                    self.character.strength += bonus
-                                    self.inventory[equip_type]['total_bonus'] += bonus
-                                elif equip_type == 'speed':
-                                    bonus = bonuses.get('speed_bonus', 0.2)
-                                    self.character.setSpeed(self.character.speed + bonus)
-                                    self.inventory[equip_type]['total_bonus'] += bonus
-                    except Exception as e:
-                        print(f"Error collecting equipment: {e}")
-                        continue
-
-    def _applyBurstHeal(self, x, y, bonuses):
-        """Apply burst heal with reduced radius and matching visuals"""
-        if 'heal_radius' not in bonuses or 'heal_amount' not in bonuses:
-            print("Invalid burst bonuses")
-            return
+            # Get screen position for debugging
+            screenPos = self.worldToScreen(tree.baseX, tree.baseY)
             
-        radius = bonuses['heal_radius']  # Now much smaller (2 cells in each direction)
-        healing = bonuses['heal_amount']
-        
-        # Create burst visual effect
-        current_time = time.time()
-        self.healingBursts.append({
-            'x': x,
-            'y': y,
-            'currentRadius': 0,
-            'maxRadius': radius * self.baseCellWidth * 2,  # Visual radius matches gameplay radius
-            'startTime': current_time,
-            'duration': 0.6,  # Faster animation for smaller radius
-            'color': 'yellow',
-            'type': 'burst',
-            'healAmount': healing,
-            'baseOpacity': 70
-        })
-        
-        # Apply healing effect
-        center_col = int(x / self.baseCellWidth)
-        center_row = int(y / self.baseCellHeight)
-        
-        # Iterate through 5x5 area
-        for row in range(center_row - radius, center_row + radius + 1):
-            for col in range(center_col - radius, center_col + radius + 1):
-                if not self._isValidCell(row, col):
-                    continue
-                    
-                key = self.textureManager.getCellKey(row, col)
-                cell = self.textureManager.cellStates.get(key)
-                if cell and cell['terrain'] != 'water':
-                    # Apply strong healing effect within small radius
-                    cell['lifeRatio'] = max(0.0, cell['lifeRatio'] - healing)
-
-    def _updateHealingBursts(self):
-        currentTime = time.time()
-        active_bursts = []
+            # Print tree info
+            print(f"Tree {treesInView + 1}:")
+            print(f"  Grid: ({gridY}, {gridX})")
+            print(f"  World: ({tree.baseX:.1f}, {tree.baseY:.1f})")
+            print(f"  Screen: ({screenPos[0]:.1f}, {screenPos[1]:.1f})")
+            
+            treesInView += 1
         
-        for burst in self.healingBursts:
-            if currentTime - burst['startTime'] < burst['duration']:
-                # Update radius
-                progress = (currentTime - burst['startTime']) / burst['duration']
-                burst['currentRadius'] = burst['maxRadius'] * (0.5 - 0.5 * math.cos(progress * math.pi))
-                active_bursts.append(burst)
-                
-        self.healingBursts = active_bursts
+        print(f"\nTrees currently visible: {treesInView}")
+        print(f"Entered view: {len(self.treesEntered)}, left view: {len(self.treesLeft)}")
+        geometry = self.treeGeometry.getStats()
+        print(f"LOD tiers last frame: {self.treeImpostors.lastTierCounts}")
+        print(f"Tree health: {self.treeHealthCounters['updated']} updates "
+              f"from {self.treeHealthCounters['sampled']} samples")
+        print(f"Geometry cache: {geometry['entries']} trees, {geometry['bytes'] / 1024:.0f} KB, "
+              f"{geometry['hits']} hits / {geometry['misses']} misses")
 
     def _drawHealingBursts(self):
         """Draw healing burst effects with appropriate sizing"""
-        current_time = time.time()
+        current_time = self.getRenderTime()
         
         for burst in self.healingBursts:
             if current_time - burst['startTime'] < burst['duration']:
-                progress = (current_time - burst['startTime']) / burst['duration']
+                progress = max(0.0, current_time - burst['startTime']) / burst['duration']
                 
                 # Convert world to screen coordinates
                 screenX, screenY = self.worldToScreen(burst['x'], burst['y'])
@@ -1119,7 +827,7 @@ class Game:
         else:
             message = "Game Over"
             color = 'red'
-            if time.time() - self.startTime >= self.gameTime:
+            if self.simTime - self.startTime >= self.gameTime:
                 subMessage = "Time's up! Deterioration was too high!"
             else:
                 subMessage = "The deterioration level became too high!"
@@ -1137,85 +845,6 @@ class Game:
         drawLabel("Press ESC to return to menu",
                  self.windowWidth / 2, titleY + 100,
                  fill='gray', size=16)
-    def _spawnCharacter(self):
-        """Spawn character on any walkable terrain"""
-        valid_positions = []
-        
-        # First collect all valid positions
-        for row in range(self.worldHeight):
-            for col in range(self.worldWidth):
-                try:
-                    x = (col + 0.5) * self.baseCellWidth
-                    y = (row + 0.5) * self.baseCellHeight
-                    if self.isTerrainWalkable(x, y):
-                        valid_positions.append((row, col))
-                except Exception as e:
-                    print(f"Error checking position ({row}, {col}): {e}")
-                    continue
-        
-        if valid_positions:
-            # Try positions until we find one that works
-            random.shuffle(valid_positions)
-            row, col = random.choice(valid_positions)
-            x = (col + 0.5) * self.baseCellWidth
-            y = (row + 0.5) * self.baseCellHeight
-            self.character.teleport(x, y)
-            print(f"Character spawned at ({row}, {col})")
-            return True
-        
-        raise Exception("No valid spawn position found!")
-
-    def _updateHealingEffects(self):
-        active_bursts = []
-        currentTime = time.time()
-        
-        for burst in self.healingBursts:
-            progress = (currentTime - burst['startTime']) / burst['duration']
-            if progress < 1.0:
-                # Apply healing to cells within current radius
-                centerX = burst['x']
-                centerY = burst['y']
-                currentRadius = burst['maxRadius'] * (0.5 - 0.5 * math.cos(progress * math.pi))
-                
-                # Get affected cells
-                centerCol = int(centerX / self.baseCellWidth)
-                centerRow = int(centerY / self.baseCellHeight)
-                radius_cells = int(currentRadius / self.baseCellWidth)
-                
-                for row in range(centerRow - radius_cells, centerRow + radius_cells + 1):
-                    for col in range(centerCol - radius_cells, centerCol + radius_cells + 1):
-                        if not self._isValidCell(row, col):
-                            continue
-                            
-                        cellX = (col + 0.5) * self.baseCellWidth
-                        cellY = (row + 0.5) * self.baseCellHeight
-                        dx = cellX - centerX
-                        dy = cellY - centerY
-                        
-                        if (dx*dx + dy*dy) <= currentRadius*currentRadius:
-                            key = self.textureManager.getCellKey(row, col)
-                            cell = self.textureManager.cellStates.get(key)
-                            if cell and cell['terrain'] != 'water':
-                                # Apply healing with power bonus
-                                cell['lifeRatio'] = max(0.0, cell['lifeRatio'] - burst['healAmount'])
-                
-                burst['currentRadius'] = currentRadius
-                active_bursts.append(burst)
-        
-        self.healingBursts = active_bursts
-
-    def getCurrentDeterioration(self):
-        """Calculate current average deterioration level across the map"""
-        totalDet = 0.0
-        count = 0
-        
-        for key, cell in self.textureManager.cellStates.items():
-            if cell['terrain'] != 'water':
-                totalDet += cell['lifeRatio']
-                count += 1
-        
-        return totalDet / max(1, count)  # Returns value between 0 and 1
-
     def isEndGameButtonClicked(self, mouseX, mouseY):
         if self.isInfiniteMode and not self.gameOver:
             buttonWidth = 100
@@ -1226,4 +855,4 @@ class Game:
             # Check if click is within button bounds
             return (abs(mouseX - buttonX) <= buttonWidth//2 and 
                     abs(mouseY - buttonY) <= buttonHeight//2)
-        return False
\ No newline at end of file
+        return False
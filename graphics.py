@@ -0,0 +1,44 @@
+'''
+====Optional Graphics====
+The one place cmu_graphics (and PIL) are imported optionally, so the
+headless simulation runs with only numpy installed. Modules that draw but
+are also used headless import from here instead:
+
+    from graphics import *
+
+Without cmu_graphics every drawing call raises a RuntimeError naming the
+missing package, instead of a bare NameError somewhere in a draw method.
+PIL's Image is exported as PILImage, since cmu_graphics has its own Image
+shape class.
+'''
+
+try:
+    from cmu_graphics import *
+    hasGraphics = True
+except ImportError:
+    hasGraphics = False
+
+    def _requiresGraphics(name):
+        def unavailable(*args, **kwargs):
+            raise RuntimeError(f"{name}() needs cmu_graphics, which is not installed "
+                               f"(headless simulations can't draw)")
+        unavailable.__name__ = name
+        return unavailable
+
+    drawRect = _requiresGraphics('drawRect')
+    drawCircle = _requiresGraphics('drawCircle')
+    drawLine = _requiresGraphics('drawLine')
+    drawLabel = _requiresGraphics('drawLabel')
+    drawImage = _requiresGraphics('drawImage')
+    drawPolygon = _requiresGraphics('drawPolygon')
+    drawOval = _requiresGraphics('drawOval')
+    drawArc = _requiresGraphics('drawArc')
+    CMUImage = _requiresGraphics('CMUImage')
+    rgb = _requiresGraphics('rgb')
+    gradient = _requiresGraphics('gradient')
+
+# after the star import, which brings in cmu_graphics' own Image shape
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
@@ -0,0 +1,119 @@
+import math
+import numpy as np
+
+'''
+====Healing Engine====
+Applies healing waves, bursts and global heals to the cell store with
+array operations instead of per-cell loops.
+
+A wave/burst is a disk growing from 0 to maxRadius. Each tick only the
+ring its front swept since the last tick is healed,
+
+    ring = (distance > healedRadius) & (distance <= currentRadius)
+
+so a cell is healed once as the front passes it. Distances come from a
+kernel computed once per (maxRadius, position inside the cell) and shared
+by every burst with that shape (equipment bursts all sit on cell centres).
+All rings due in one tick are summed into a single heal delta over their
+union and written to the store in one go, so many concurrent bursts still
+cost one write.
+'''
+
+class HealingEngine:
+    def __init__(self, cellStates, cellWidth=10, cellHeight=8):
+        self.cellStates = cellStates
+        self.cellWidth = cellWidth
+        self.cellHeight = cellHeight
+        self.distanceKernels = {}
+        self.maxKernels = 64
+
+    def getDistanceKernel(self, maxRadius, offsetX, offsetY):
+        """Distances from a point (offsetX, offsetY) inside a cell to the centres of the cells
+        around it, out to maxRadius. Returns (reachRows, reachCols, distance)."""
+        key = (maxRadius, round(offsetX, 2), round(offsetY, 2))
+        if key not in self.distanceKernels:
+            if len(self.distanceKernels) >= self.maxKernels:
+                self.distanceKernels.clear()
+
+            # a full-map wave never needs to reach further than the world itself
+            states = self.cellStates
+            reachCols = min(states.worldWidth, int(math.ceil(maxRadius / self.cellWidth)) + 1)
+            reachRows = min(states.worldHeight, int(math.ceil(maxRadius / self.cellHeight)) + 1)
+
+            dx = (np.arange(-reachCols, reachCols + 1) + 0.5) * self.cellWidth - offsetX
+            dy = (np.arange(-reachRows, reachRows + 1) + 0.5) * self.cellHeight - offsetY
+            distance = np.sqrt(dx[np.newaxis, :] ** 2 + dy[:, np.newaxis] ** 2).astype(np.float32)
+            self.distanceKernels[key] = (reachRows, reachCols, distance)
+        return self.distanceKernels[key]
+
+    def _ringWindow(self, x, y, maxRadius, outerRadius):
+        """World (rows, cols) slices and the matching distance patch covering a disk of outerRadius"""
+        states = self.cellStates
+        centerCol, centerRow = int(x // self.cellWidth), int(y // self.cellHeight)
+        reachRows, reachCols, distance = self.getDistanceKernel(
+            maxRadius, x - centerCol * self.cellWidth, y - centerRow * self.cellHeight)
+
+        # only the part of the kernel the front has reached so far
+        rowReach = min(reachRows, int(math.ceil(outerRadius / self.cellHeight)) + 1)
+        colReach = min(reachCols, int(math.ceil(outerRadius / self.cellWidth)) + 1)
+        rowStart = max(0, centerRow - rowReach)
+        rowEnd = min(states.worldHeight, centerRow + rowReach + 1)
+        colStart = max(0, centerCol - colReach)
+        colEnd = min(states.worldWidth, centerCol + colReach + 1)
+        if rowStart >= rowEnd or colStart >= colEnd:
+            return None
+
+        top, left = centerRow - reachRows, centerCol - reachCols
+        patch = distance[rowStart - top:rowEnd - top, colStart - left:colEnd - left]
+        return rowStart, colStart, rowEnd, colEnd, patch
+
+    def healRings(self, rings):
+        """Heal every ring in one store write.
+        rings: (x, y, maxRadius, innerRadius, outerRadius, healAmount) in world units"""
+        windows = []
+        for x, y, maxRadius, innerRadius, outerRadius, healAmount in rings:
+            if outerRadius <= innerRadius or healAmount <= 0:
+                continue
+            window = self._ringWindow(x, y, maxRadius, outerRadius)
+            if window:
+                windows.append((window, innerRadius, outerRadius, healAmount))
+        if not windows:
+            return False
+
+        rowStart = min(window[0] for window, *_ in windows)
+        colStart = min(window[1] for window, *_ in windows)
+        rowEnd = max(window[2] for window, *_ in windows)
+        colEnd = max(window[3] for window, *_ in windows)
+        delta = np.zeros((rowEnd - rowStart, colEnd - colStart), dtype=np.float32)
+        for (top, left, bottom, right, patch), innerRadius, outerRadius, healAmount in windows:
+            ring = (patch > innerRadius) & (patch <= outerRadius)
+            delta[top - rowStart:bottom - rowStart, left - colStart:right - colStart] += ring * healAmount
+
+        return self._applyDelta(slice(rowStart, rowEnd), slice(colStart, colEnd), delta)
+
+    def healSquare(self, row, col, radius, healAmount):
+        """Heal the (2 * radius + 1)^2 block of cells around (row, col)"""
+        states = self.cellStates
+        rows = slice(max(0, row - radius), min(states.worldHeight, row + radius + 1))
+        cols = slice(max(0, col - radius), min(states.worldWidth, col + radius + 1))
+        if rows.start >= rows.stop or cols.start >= cols.stop:
+            return False
+        return self._applyDelta(rows, cols, healAmount)
+
+    def healFraction(self, fraction):
+        """Heal every deteriorating cell by a fraction of its current deterioration"""
+        states = self.cellStates
+        old = states.current()
+        healed = np.maximum(0.0, old - old * fraction)
+        states.write(slice(None), slice(None), healed, mask=states.decays)
+        return bool(np.any((healed != old) & states.decays))
+
+    def _applyDelta(self, rows, cols, delta):
+        states = self.cellStates
+        # water doesn't deteriorate or heal
+        mask = states.decays[rows, cols] & (np.asarray(delta) > 0)
+        if not np.any(mask):
+            return False
+        healed = np.maximum(0.0, states.current(rows, cols) - delta)
+        states.write(rows, cols, healed, mask=mask)
+        return True
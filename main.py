@@ -7,7 +7,9 @@ import time
 def onAppStart(app):
     app.width = 800
     app.height = 600
+    # render rate; the game simulates at its own fixed rate (Game.simHz)
     app.stepsPerSecond = 60
+    app.lastStepTime = time.perf_counter()
     app.setMaxShapeCount(99999)
     app.state = 'menu'
     app.menu = MenuState(app.width, app.height)
@@ -15,6 +17,8 @@ def onAppStart(app):
     app.mapEditor = None
 
 def initializeGame(app, customMap=None, isInfiniteMode=False):
+    if app.game:
+        app.game.close()
     app.game = Game(customMap, isInfiniteMode=isInfiniteMode)
 
 def gameKeyEvents(app, key):
@@ -90,8 +94,7 @@ def onKeyHold(app, keys):
                 app.game.character.direction = 'left' if dx < 0 else 'right'
             if dy:
                 app.game.character.direction = 'up' if dy < 0 else 'down'
-            app.game.character.move(app.game, dx, dy)
-            app.game.updateCamera()
+            app.game.setMoveInput(dx, dy)
 
 def onMousePress(app, mouseX, mouseY):
     if app.state == 'menu':
@@ -105,7 +108,6 @@ def onMousePress(app, mouseX, mouseY):
             if terrainMap:
                 initializeGame(app, customMap=terrainMap)
                 app.state = 'game'
-                app.game.startTime = time.time()
         elif app.mapEditor.isOverInfiniteButton(mouseX, mouseY):
             terrainMap = app.mapEditor.generateTerrainMap()
             if terrainMap:
@@ -117,10 +119,11 @@ def onMousePress(app, mouseX, mouseY):
             app.game.endGame()
 
 def onStep(app):
+    now = time.perf_counter()
+    realDt = now - app.lastStepTime
+    app.lastStepTime = now
     if app.state == 'game' and not app.game.gameOver:
-        app.game.updateGame(1/app.stepsPerSecond)
-        app.game.update()
-        app.game.character.updateAnimation()
+        app.game.advance(realDt)
 
 def onMouseMove(app, mouseX, mouseY):
     if app.state == 'editor':
@@ -1,4 +1,4 @@
-from cmu_graphics import *
+from graphics import *
 import numpy as np
 import random
 
@@ -129,30 +129,13 @@ class MiniMap:
                 # Get global deterioration value
                 globalDeterioration = textureManager.calculateGlobalDeterioration()
                 
-                # Calculate scale factors to map entire world to minimap resolution
-                scaleY = self.worldHeight / self.resolution['rows']
-                scaleX = self.worldWidth / self.resolution['cols']
+                # Downsample: each minimap cell shows the mean of the world block it covers
+                rowEdges = np.linspace(0, self.worldHeight, self.resolution['rows'] + 1).astype(int)
+                colEdges = np.linspace(0, self.worldWidth, self.resolution['cols'] + 1).astype(int)
                 
-                for i in range(self.resolution['rows']):
-                    for j in range(self.resolution['cols']):
-                        # Map minimap coordinates to world coordinates
-                        worldY = int(i * scaleY)
-                        worldX = int(j * scaleX)
-                        
-                        # Ensure we stay within world bounds
-                        worldY = min(worldY, self.worldHeight - 1)
-                        worldX = min(worldX, self.worldWidth - 1)
-                        
-                        # Get cell state for this world position
-                        key = f"{worldY},{worldX}"
-                        state = textureManager.cellStates.get(key)
-                        
-                        if state and state['terrain'] != 'water':
-                            # Use actual deterioration value
-                            self.cache.deteriorationColors[i, j] = state['lifeRatio']
-                        else:
-                            # Water or invalid cells get 0 deterioration
-                            self.cache.deteriorationColors[i, j] = 0.0
+                # Water and unexplored cells don't count; empty blocks show 0 deterioration
+                self.cache.deteriorationColors = textureManager.regionQuery.meanGrid(
+                    rowEdges, colEdges, excludeStatic=True, empty=0.0)
                             
             except Exception as e:
                 print(f"Error updating deterioration: {e}")
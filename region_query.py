@@ -0,0 +1,292 @@
+import numpy as np
+
+'''
+====Region Query Engine====
+Answers "mean / min / max lifeRatio over a rectangle or disk" from a
+CellStateStore without looping over cells in Python.
+
+Because the store evaluates decay lazily, every cell's current value is
+either a constant or a straight line in the clock until it saturates:
+
+    static cell (water)        -> lifeRatio
+    decaying, not saturated    -> base + decayRate * clock      (base = lifeRatio - decayRate * lastUpdate)
+    saturated                  -> 1.0
+
+The layers below only change when the store writes, so they are kept as
+blocked summed-area tables (for sums and counts) and an 8x8 block min/max
+pyramid (for extremes). The prefix sum up to (row, col) is split as
+
+    prefix(row, col) = bandTable[row // 8, col] + bandPrefix[row, col]
+
+where bandPrefix only sums row prefixes inside the row's own 8-row band, so
+a write only rebuilds its own rows and bands instead of everything below
+and right of it.
+
+    sum(rect)  = B + decayRate * clock * P + S
+    count      = N (initialized) or N - Z (excluding static terrain)
+
+Uninitialized cells can be read as a fill value (trees treat unexplored
+land as fully deteriorated) or skipped.
+'''
+
+class RegionQuery:
+    layerNames = ('base', 'slope', 'saturated', 'initialized', 'static', 'staticValue')
+
+    def __init__(self, cellStates, blockSize=8):
+        self.cellStates = cellStates
+        self.blockSize = blockSize
+        height, width = cellStates.worldHeight, cellStates.worldWidth
+
+        # one stacked layer per name plus its blocked prefix sums (padded with a zero column)
+        layerCount = len(self.layerNames)
+        bandCount = (height + blockSize - 1) // blockSize
+        self.layerIndex = {name: i for i, name in enumerate(self.layerNames)}
+        self.layers = np.zeros((layerCount, height, width))
+        self.rowPrefix = np.zeros((layerCount, height, width + 1))
+        self.bandPrefix = np.zeros((layerCount, height + 1, width + 1))
+        self.bandTotals = np.zeros((layerCount, bandCount, width + 1))
+        self.bandTable = np.zeros((layerCount, bandCount + 1, width + 1))
+
+        # cell-level layers used for min/max on partial blocks
+        self.base = np.zeros((height, width))
+        self.decayMask = np.zeros((height, width), dtype=bool)
+        self.staticMask = np.zeros((height, width), dtype=bool)
+
+        blockRows = (height + blockSize - 1) // blockSize
+        blockCols = (width + blockSize - 1) // blockSize
+        self.blockMin = {kind: np.full((blockRows, blockCols), np.inf) for kind in ('decay', 'static')}
+        self.blockMax = {kind: np.full((blockRows, blockCols), -np.inf) for kind in ('decay', 'static')}
+
+        self.dirty = (0, 0, height, width)
+        cellStates.listeners.append(self.markDirty)
+
+    def markDirty(self, rowStart, colStart, rowEnd, colEnd):
+        if self.dirty is None:
+            self.dirty = (rowStart, colStart, rowEnd, colEnd)
+        else:
+            r0, c0, r1, c1 = self.dirty
+            self.dirty = (min(r0, rowStart), min(c0, colStart), max(r1, rowEnd), max(c1, colEnd))
+
+    #====Incremental refresh====
+    def refresh(self):
+        if self.dirty is None:
+            return
+        rowStart, colStart, rowEnd, colEnd = self.dirty
+        self.dirty = None
+
+        # rebuild the layers inside the dirty box only
+        states = self.cellStates
+        rows, cols = slice(rowStart, rowEnd), slice(colStart, colEnd)
+        initialized = states.terrainIds[rows, cols] != states.UNINITIALIZED
+        static = initialized & ~states.decays[rows, cols]
+        saturated = states.saturated[rows, cols]
+        decaying = initialized & states.decays[rows, cols] & ~saturated
+        lifeRatio = states.lifeRatio[rows, cols].astype(np.float64)
+        base = np.where(decaying, lifeRatio - states.decayRate * states.lastUpdate[rows, cols], 0.0)
+        base = np.where(static, lifeRatio, base)
+
+        self.base[rows, cols] = base
+        self.decayMask[rows, cols] = decaying
+        self.staticMask[rows, cols] = static
+
+        layers = self.layers
+        index = self.layerIndex
+        layers[index['base'], rows, cols] = base
+        layers[index['slope'], rows, cols] = decaying
+        layers[index['saturated'], rows, cols] = saturated
+        layers[index['initialized'], rows, cols] = initialized
+        layers[index['static'], rows, cols] = static
+        layers[index['staticValue'], rows, cols] = np.where(static, lifeRatio, 0.0)
+
+        self._refreshPrefixes(rowStart, colStart, rowEnd, colEnd)
+        self._refreshBlocks(rowStart, colStart, rowEnd, colEnd)
+
+    def _refreshPrefixes(self, rowStart, colStart, rowEnd, colEnd):
+        size = self.blockSize
+        height = self.cellStates.worldHeight
+        cols = slice(colStart + 1, None)
+
+        # row prefixes only change on dirty rows, right of the first dirty column
+        self.rowPrefix[:, rowStart:rowEnd, cols] = (self.rowPrefix[:, rowStart:rowEnd, colStart:colStart + 1] +
+                                                    self.layers[:, rowStart:rowEnd, colStart:].cumsum(axis=2))
+
+        firstBand, lastBand = rowStart // size, (rowEnd - 1) // size
+        for band in range(firstBand, lastBand + 1):
+            top, bottom = band * size, min(band * size + size, height)
+            running = self.rowPrefix[:, top:bottom, cols].cumsum(axis=1)
+            self.bandTotals[:, band, cols] = running[:, -1]
+            # index top + size starts the next band, which restarts at zero
+            filled = bottom - top if bottom - top < size else size - 1
+            self.bandPrefix[:, top + 1:top + 1 + filled, cols] = running[:, :filled]
+
+        self.bandTable[:, firstBand + 1:, cols] = (self.bandTable[:, firstBand:firstBand + 1, cols] +
+                                                   self.bandTotals[:, firstBand:, cols].cumsum(axis=1))
+
+    def _refreshBlocks(self, rowStart, colStart, rowEnd, colEnd):
+        size = self.blockSize
+        blockRowStart, blockRowEnd = rowStart // size, (rowEnd + size - 1) // size
+        blockColStart, blockColEnd = colStart // size, (colEnd + size - 1) // size
+        rows = slice(blockRowStart * size, blockRowEnd * size)
+        cols = slice(blockColStart * size, blockColEnd * size)
+
+        base = self.base[rows, cols]
+        for kind, mask in (('decay', self.decayMask[rows, cols]), ('static', self.staticMask[rows, cols])):
+            low = self._blockReduce(np.where(mask, base, np.inf), np.min, np.inf)
+            high = self._blockReduce(np.where(mask, base, -np.inf), np.max, -np.inf)
+            self.blockMin[kind][blockRowStart:blockRowEnd, blockColStart:blockColEnd] = low
+            self.blockMax[kind][blockRowStart:blockRowEnd, blockColStart:blockColEnd] = high
+
+    def _blockReduce(self, values, reducer, padValue):
+        size = self.blockSize
+        height, width = values.shape
+        padded = np.full((-(-height // size) * size, -(-width // size) * size), padValue)
+        padded[:height, :width] = values
+        blocks = padded.reshape(padded.shape[0] // size, size, padded.shape[1] // size, size)
+        return reducer(blocks, axis=(1, 3))
+
+    #====Queries====
+    def _clip(self, rowStart, colStart, rowEnd, colEnd):
+        states = self.cellStates
+        return (max(0, rowStart), max(0, colStart),
+                min(states.worldHeight, rowEnd), min(states.worldWidth, colEnd))
+
+    def _tableSum(self, name, rowStart, colStart, rowEnd, colEnd):
+        # works on scalars or equally shaped index arrays
+        layer = self.layerIndex[name]
+        return (self._prefix(layer, rowEnd, colEnd) - self._prefix(layer, rowStart, colEnd) -
+                self._prefix(layer, rowEnd, colStart) + self._prefix(layer, rowStart, colStart))
+
+    def _prefix(self, layer, row, col):
+        return self.bandTable[layer, row // self.blockSize, col] + self.bandPrefix[layer, row, col]
+
+    def rectSums(self, rowStart, colStart, rowEnd, colEnd, fill=None, excludeStatic=False):
+        """Vectorized (sum, count) for rectangles given as scalars or arrays of clipped bounds"""
+        self.refresh()
+        states = self.cellStates
+        bounds = (rowStart, colStart, rowEnd, colEnd)
+        total = (self._tableSum('base', *bounds) +
+                 states.decayRate * states.clock * self._tableSum('slope', *bounds) +
+                 self._tableSum('saturated', *bounds))
+        count = self._tableSum('initialized', *bounds)
+        if excludeStatic:
+            total = total - self._tableSum('staticValue', *bounds)
+            count = count - self._tableSum('static', *bounds)
+        if fill is not None:
+            area = (np.asarray(rowEnd) - rowStart) * (np.asarray(colEnd) - colStart)
+            missing = area - self._tableSum('initialized', *bounds)
+            total = total + fill * missing
+            count = count + missing
+        return total, count
+
+    def rectStats(self, rowStart, colStart, rowEnd, colEnd, fill=None, excludeStatic=False):
+        """Return {'mean', 'min', 'max', 'count'} over [rowStart, rowEnd) x [colStart, colEnd)"""
+        rowStart, colStart, rowEnd, colEnd = self._clip(rowStart, colStart, rowEnd, colEnd)
+        if rowStart >= rowEnd or colStart >= colEnd:
+            return None
+
+        total, count = self.rectSums(rowStart, colStart, rowEnd, colEnd, fill, excludeStatic)
+        if count <= 0:
+            return None
+        low, high = self._rectExtremes(rowStart, colStart, rowEnd, colEnd, fill, excludeStatic)
+        return {'mean': float(total / count), 'min': low, 'max': high, 'count': int(count)}
+
+    def meanGrid(self, rowEdges, colEdges, fill=None, excludeStatic=False, empty=0.0):
+        """Mean lifeRatio of every block of a grid given by row/column edges, in one pass"""
+        rowEdges = np.clip(np.asarray(rowEdges), 0, self.cellStates.worldHeight)
+        colEdges = np.clip(np.asarray(colEdges), 0, self.cellStates.worldWidth)
+        rowStart, colStart = np.meshgrid(rowEdges[:-1], colEdges[:-1], indexing='ij')
+        rowEnd, colEnd = np.meshgrid(rowEdges[1:], colEdges[1:], indexing='ij')
+        total, count = self.rectSums(rowStart, colStart, rowEnd, colEnd, fill, excludeStatic)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / np.maximum(count, 1), empty)
+
+    def boxMeans(self, rows, cols, radius=1, fill=None, excludeStatic=False, empty=0.0):
+        """Mean of the (2 * radius + 1)^2 box (clipped to the world) around each (row, col):
+        a box filter sampled only at the given cells, in one pass"""
+        states = self.cellStates
+        rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+        rowStart = np.clip(rows - radius, 0, states.worldHeight)
+        colStart = np.clip(cols - radius, 0, states.worldWidth)
+        rowEnd = np.clip(rows + radius + 1, 0, states.worldHeight)
+        colEnd = np.clip(cols + radius + 1, 0, states.worldWidth)
+        total, count = self.rectSums(rowStart, colStart, rowEnd, colEnd, fill, excludeStatic)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / np.maximum(count, 1), empty)
+
+    def diskStats(self, row, col, radius, fill=None, excludeStatic=False):
+        """Stats over cells within `radius` cells of (row, col), one row span at a time"""
+        radius = int(radius)
+        offsets = np.arange(-radius, radius + 1)
+        halfWidths = np.floor(np.sqrt(radius * radius - offsets * offsets)).astype(int)
+        rowStart = np.clip(row + offsets, 0, self.cellStates.worldHeight)
+        rowEnd = np.clip(row + offsets + 1, 0, self.cellStates.worldHeight)
+        colStart = np.clip(col - halfWidths, 0, self.cellStates.worldWidth)
+        colEnd = np.clip(col + halfWidths + 1, 0, self.cellStates.worldWidth)
+        keep = (rowStart < rowEnd) & (colStart < colEnd)
+        if not np.any(keep):
+            return None
+        spans = (rowStart[keep], colStart[keep], rowEnd[keep], colEnd[keep])
+
+        total, count = self.rectSums(*spans, fill=fill, excludeStatic=excludeStatic)
+        total, count = total.sum(), count.sum()
+        if count <= 0:
+            return None
+        extremes = [self._rectExtremes(*span, fill, excludeStatic) for span in zip(*spans)]
+        return {'mean': float(total / count),
+                'min': min(low for low, _ in extremes),
+                'max': max(high for _, high in extremes),
+                'count': int(count)}
+
+    #====Min / max from the block pyramid====
+    def _rectExtremes(self, rowStart, colStart, rowEnd, colEnd, fill, excludeStatic):
+        states = self.cellStates
+        size = self.blockSize
+        kinds = ('decay',) if excludeStatic else ('decay', 'static')
+        lows = {kind: np.inf for kind in kinds}
+        highs = {kind: -np.inf for kind in kinds}
+
+        innerRowStart, innerRowEnd = -(-rowStart // size), rowEnd // size
+        innerColStart, innerColEnd = -(-colStart // size), colEnd // size
+        if innerRowStart < innerRowEnd and innerColStart < innerColEnd:
+            inner = (slice(innerRowStart, innerRowEnd), slice(innerColStart, innerColEnd))
+            for kind in kinds:
+                lows[kind] = self.blockMin[kind][inner].min()
+                highs[kind] = self.blockMax[kind][inner].max()
+            # the strips around the whole blocks
+            edges = [(rowStart, colStart, innerRowStart * size, colEnd),
+                     (innerRowEnd * size, colStart, rowEnd, colEnd),
+                     (innerRowStart * size, colStart, innerRowEnd * size, innerColStart * size),
+                     (innerRowStart * size, innerColEnd * size, innerRowEnd * size, colEnd)]
+        else:
+            edges = [(rowStart, colStart, rowEnd, colEnd)]
+
+        for r0, c0, r1, c1 in edges:
+            if r0 >= r1 or c0 >= c1:
+                continue
+            base = self.base[r0:r1, c0:c1]
+            for kind in kinds:
+                mask = (self.decayMask if kind == 'decay' else self.staticMask)[r0:r1, c0:c1]
+                if mask.any():
+                    lows[kind] = min(lows[kind], base[mask].min())
+                    highs[kind] = max(highs[kind], base[mask].max())
+
+        candidatesLow, candidatesHigh = [], []
+        drift = states.decayRate * states.clock
+        if lows['decay'] != np.inf:
+            candidatesLow.append(min(1.0, lows['decay'] + drift))
+            candidatesHigh.append(min(1.0, highs['decay'] + drift))
+        if not excludeStatic and lows['static'] != np.inf:
+            candidatesLow.append(lows['static'])
+            candidatesHigh.append(highs['static'])
+        if self._tableSum('saturated', rowStart, colStart, rowEnd, colEnd) > 0:
+            candidatesLow.append(1.0)
+            candidatesHigh.append(1.0)
+        if fill is not None:
+            area = (rowEnd - rowStart) * (colEnd - colStart)
+            if self._tableSum('initialized', rowStart, colStart, rowEnd, colEnd) < area:
+                candidatesLow.append(fill)
+                candidatesHigh.append(fill)
+
+        if not candidatesLow:
+            return None, None
+        return float(min(candidatesLow)), float(max(candidatesHigh))
@@ -0,0 +1,636 @@
+import random
+import math
+import numpy as np
+from deterioration import DeteriorationModel
+from character import Character
+from map_editor import MapEditor
+from tree import Tree
+from equipment import Equipment
+from spatial_index import SpatialGrid
+from byte_cache import ByteLRUCache
+from tree_generator import TreeGenerationPool
+
+'''
+====Headless Simulation====
+Everything that moves the world forward - terrain health, the character,
+equipment, healing bursts and tree life - with no drawing. Game subclasses
+this and only adds rendering, so the same Simulation can be stepped on a
+server with no display (benchmarks, soak tests, parameter sweeps):
+
+    sim = Simulation(Simulation.generateMap(seed=1))
+    sim.runSteps(600)   # 10 simulated seconds at 60 Hz
+    print(sim.getCurrentDeterioration())
+
+The "viewport" (camera, zoom, window size) is kept here too because it
+decides which chunks get explored and which trees are alive, so a headless
+run follows the character exactly like the game does.
+'''
+
+class Simulation:
+    # Game swaps in TextureManagerOptimized; headless runs only need terrain health
+    terrainModelClass = DeteriorationModel
+    headless = True
+    # geometry of trees that left the view is kept until this budget runs out
+    treeGeometryBudget = 8 * 1024 * 1024
+    # worker threads building tree geometry; 0 builds in place (deterministic headless runs)
+    treeWorkers = 0
+    # a visible tree is only updated once its neighbourhood health moves this much or crosses a phase
+    treeHealthThreshold = 0.02
+
+    def __init__(self, customMap=None, isInfiniteMode=False):
+        self.isInfiniteMode = isInfiniteMode
+        self.statistics = {
+            'deterioration': [],
+            'power': [],
+            'speed': [],
+            'healingRadius': [],
+            'timestamps': []
+        }
+        self.windowWidth = 800
+        self.windowHeight = 600
+        # world size follows the map; 200x150 is what the editor generates
+        self.worldWidth = len(customMap[0]) if customMap else 200
+        self.worldHeight = len(customMap) if customMap else 150
+        self.baseCellWidth = 10
+        self.baseCellHeight = 8
+        
+        self.cameraX = self.cameraY = 0
+        self.zoomLevel = 8.0
+        self.minZoom = 5.0
+        self.maxZoom = 10.0
+        
+        self.textureManager = self.terrainModelClass(self.worldWidth, self.worldHeight,
+                                                     self.baseCellWidth, self.baseCellHeight)
+        if not customMap:
+            raise Exception("Need a map to start game!")
+        self.grid = customMap
+        self.textureManager.setTerrainGrid(self.grid)
+        
+        # Equipment lives in a spatial grid (8x8-cell buckets) for pickup and draw culling
+        self.equipment = SpatialGrid(self.baseCellWidth * 8, self.baseCellHeight * 8)
+        self.equipmentDensity = 0.05
+        
+        # Create character with adjusted initial values
+        self.character = Character(self.worldWidth, self.worldHeight, 
+                                self.baseCellWidth, self.baseCellHeight,
+                                loadSprites=not self.headless)
+        self.character.strength = 0.1
+        self.character.restorationRadiusMultiplier = 5
+        self.character.healingWave['healAmount'] = 0.05
+        
+        try:
+            # Spawn character on high ground
+            self._spawnCharacter()
+        except Exception as e:
+            print(f"Failed to spawn character: {e}")
+            raise Exception("Cannot start game: No valid spawn position found")
+        
+        # Spawn equipment
+        self._spawnEquipment()
+        self.updateCamera()
+        
+        # fixed-timestep simulation: the sim runs at simHz no matter how often we render,
+        # catching up with at most maxSubsteps steps per frame
+        self.simHz = 60
+        self.maxSubsteps = 5
+        self.simTime = 0.0
+        self.simAccumulator = 0.0
+        self.renderAlpha = 1.0
+        self.moveInput = None
+        self.prevCharacterPosition = None
+
+        self.gameOver = False
+        self.gameWon = False
+        self.startTime = self.simTime
+        self.gameTime = 60
+        
+        self.treeDensity = 0.05
+        self.trees = []
+        # trees bucketed by cell (x=col, y=row) so the view only touches nearby buckets
+        self.treeIndex = SpatialGrid(8, 8)
+        self.visibleTrees = set()
+        self.treesEntered = set()
+        self.treesLeft = set()
+        self.treeGeometry = ByteLRUCache(self.treeGeometryBudget)  # treeId -> geometry
+        self.treeGenerator = TreeGenerationPool(self.treeWorkers) if self.treeWorkers else None
+        self.treePhaseBoundaries = np.array(Tree.getPhaseBoundaries())
+        self.treeHealthCounters = {'sampled': 0, 'updated': 0}
+        self._spawnTrees()
+        
+        self.inventory = {
+            'radius': {'count': 0, 'total_bonus': 0},
+            'power': {'count': 0, 'total_bonus': 0},
+            'speed': {'count': 0, 'total_bonus': 0},
+            'burst': {'count': 0}
+        }
+        self.healingBursts = []  # List to track active burst animations
+
+    @staticmethod
+    def generateMap(worldWidth=200, worldHeight=150, seed=None):
+        """Random terrain map, as if the editor canvas had been painted with noise"""
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        editor = MapEditor(800, 600, worldWidth, worldHeight)
+        editor.grid[:] = np.random.uniform(0.1, 0.9, editor.grid.shape)
+        return editor.generateTerrainMap()
+
+    #====World Setup====
+    def _spawnTrees(self):
+        ok_terrain = {'dirt', 'tiny_leaves', 'tall_grass'}
+        
+        # Clear existing trees
+        self.trees = []
+        self.treeIndex.clear()
+        self.treeGeometry.clear()
+        if self.treeGenerator:
+            self.treeGenerator.clear()
+        self.visibleTrees = set()
+        
+        # Only spawn trees within valid bounds
+        for row in range(min(self.worldHeight, len(self.grid))):
+            for col in range(min(self.worldWidth, len(self.grid[row]))):
+                try:
+                    cell = self.grid[row][col]
+                    if isinstance(cell, dict) and cell.get('terrain') in ok_terrain:
+                        if random.random() < self.treeDensity:
+                            x = (col + 0.5) * self.baseCellWidth
+                            y = (row + 0.5) * self.baseCellHeight
+                            tree = Tree(x, y)
+                            self.trees.append((tree, (row, col)))
+                            self.treeIndex.insert(tree, col, row)
+                except Exception as e:
+                    print(f"Tree spawn failed at {row}, {col}: {e}")
+
+    def _spawnCharacter(self):
+        """Spawn character on any walkable terrain"""
+        valid_positions = []
+        
+        # First collect all valid positions
+        for row in range(self.worldHeight):
+            for col in range(self.worldWidth):
+                try:
+                    x = (col + 0.5) * self.baseCellWidth
+                    y = (row + 0.5) * self.baseCellHeight
+                    if self.isTerrainWalkable(x, y):
+                        valid_positions.append((row, col))
+                except Exception as e:
+                    print(f"Error checking position ({row}, {col}): {e}")
+                    continue
+        
+        if valid_positions:
+            # Try positions until we find one that works
+            random.shuffle(valid_positions)
+            row, col = random.choice(valid_positions)
+            x = (col + 0.5) * self.baseCellWidth
+            y = (row + 0.5) * self.baseCellHeight
+            self.character.teleport(x, y)
+            print(f"Character spawned at ({row}, {col})")
+            return True
+        
+        raise Exception("No valid spawn position found!")
+
+    def _spawnEquipment(self):
+        """Spawn equipment on valid terrain (not water)"""
+        self.equipment.clear()  # Clear existing equipment
+        ok_terrain = {'dirt', 'tall_grass', 'path_rocks'}
+        
+        # Adjust equipment density for infinite mode
+        density = self.equipmentDensity * 1.5 if self.isInfiniteMode else self.equipmentDensity
+        
+        for row in range(self.worldHeight):
+            for col in range(self.worldWidth):
+                try:
+                    cell = self.grid[row][col]
+                    if cell['terrain'] in ok_terrain and random.random() < density:
+                        x = (col + 0.5) * self.baseCellWidth
+                        y = (row + 0.5) * self.baseCellHeight
+                        self.equipment.insert(Equipment(x, y), x, y)
+                        print(f"Spawned equipment at ({row}, {col})")
+                except Exception as e:
+                    print(f"Equipment spawn failed at {row}, {col}: {e}")
+        
+        print(f"Total equipment spawned: {len(self.equipment)}")
+
+    def placeTrees(self):
+        """Respawn trees, e.g. after treeDensity changed"""
+        self._spawnTrees()
+
+    def setCustomGrid(self, newGrid):
+        if len(newGrid) == self.worldHeight and len(newGrid[0]) == self.worldWidth:
+            self.grid = newGrid
+            self.textureManager.setTerrainGrid(self.grid)
+            self._spawnTrees()  # Regenerate trees when grid changes
+            return True
+        return False
+
+    #====Viewport====
+    def getVisibleCells(self):
+        # Add extra cells around the visible area
+        PADDING = 5
+        
+        # Find top-left corner of visible area
+        startCol = int(self.cameraX / self.baseCellWidth)
+        startRow = int(self.cameraY / self.baseCellHeight)
+        
+        # Calculate how many cells fit on screen at current zoom
+        cellsWide = int(self.windowWidth / (self.baseCellWidth * self.zoomLevel))
+        cellsHigh = int(self.windowHeight / (self.baseCellHeight * self.zoomLevel))
+        
+        # Add padding and clamp to world bounds
+        startCol = max(0, startCol - PADDING)
+        startRow = max(0, startRow - PADDING)
+        endCol = min(self.worldWidth, startCol + cellsWide + PADDING * 2)
+        endRow = min(self.worldHeight, startRow + cellsHigh + PADDING * 2)
+        
+        return startRow, startCol, endRow, endCol
+
+    def updateCamera(self, charPos=None):
+        charX, charY = charPos if charPos else self.character.getPosition()
+        self.cameraX = charX - (self.windowWidth / (2 * self.zoomLevel))
+        self.cameraY = charY - (self.windowHeight / (2 * self.zoomLevel))
+
+    def setZoom(self, newZoom):
+        self.zoomLevel = max(self.minZoom, min(self.maxZoom, newZoom))
+        self.updateCamera()
+
+    def _isValidCell(self, row, col):
+        return 0 <= row < self.worldHeight and 0 <= col < self.worldWidth
+
+    def getTreesInRange(self, startRow, startCol, endRow, endCol):
+        """Trees within a cell range (plus one cell of padding), in a stable order"""
+        return self.treeIndex.queryRect(startCol - 1, startRow - 1, endCol + 1, endRow + 1)
+
+    def updateVisibleTrees(self, startRow, startCol, endRow, endCol):
+        """Refresh the visible tree set; returns (visible, entered, left) since the last call"""
+        visible = self.getTreesInRange(startRow, startCol, endRow, endCol)
+        visibleSet = set(visible)
+        self.treesEntered = visibleSet - self.visibleTrees
+        self.treesLeft = self.visibleTrees - visibleSet
+        self.visibleTrees = visibleSet
+        return visible, self.treesEntered, self.treesLeft
+
+    def updateTreeHealth(self, trees):
+        """Sample the 3x3 neighbourhood health of all trees in one batched query and call
+        updateTreeLife only for trees that need it: flagged with needsUpdate, moved by at
+        least treeHealthThreshold since their last update, or crossed a phase boundary"""
+        if not trees:
+            return 0
+        rows = np.fromiter((tree.baseY // self.baseCellHeight for tree in trees), dtype=np.int64, count=len(trees))
+        cols = np.fromiter((tree.baseX // self.baseCellWidth for tree in trees), dtype=np.int64, count=len(trees))
+        # unexplored cells count as dead, like getSurroundingTerrainHealth
+        health = self.textureManager.getBoxMeans(rows, cols, 1, fill=1.0)
+
+        last = np.fromiter((tree.lifeRatio for tree in trees), dtype=np.float64, count=len(trees))
+        flagged = np.fromiter((tree.needsUpdate for tree in trees), dtype=bool, count=len(trees))
+        low, high = np.minimum(last, health), np.maximum(last, health)
+        boundaries = self.treePhaseBoundaries
+        crossed = np.any((low[:, np.newaxis] <= boundaries) & (boundaries <= high[:, np.newaxis]), axis=1)
+        moved = np.abs(health - last) >= self.treeHealthThreshold
+        fire = flagged | moved | (crossed & (health != last))
+
+        for index in np.flatnonzero(fire).tolist():
+            tree = trees[index]
+            tree.updateTreeLife(float(health[index]))
+            tree.needsUpdate = False
+        self.treeHealthCounters['sampled'] += len(trees)
+        self.treeHealthCounters['updated'] += int(fire.sum())
+        return int(fire.sum())
+
+    def ensureTreeGenerated(self, tree):
+        """Bring the tree's geometry up to its layer count and leaf colour: from the
+        cache, from the worker pool (the tree keeps its old geometry, or none, until
+        the build arrives) or built in place when there is no pool"""
+        if not tree.needsGeometry():
+            return
+        if not tree.layers:
+            tree.growLayer()
+        if self.treeGenerator and self.treeGenerator.isPending(tree):
+            return
+        # a cached build for fewer layers or an older leaf colour is stale
+        geometry = self.treeGeometry.get(tree.treeId)
+        if geometry is not None:
+            self.treeGeometry.pop(tree.treeId)
+        if (geometry is not None and geometry['geometryLayers'] == tree.layers and
+                geometry['leafColorStage'] == tree.colorStage):
+            tree.setGeometry(geometry)
+        elif self.treeGenerator:
+            self.treeGenerator.request(tree)
+        else:
+            tree.generateBranches()
+
+    def collectTreeGeometry(self):
+        """Install geometry finished by the worker pool; trees that left the view meanwhile
+        get it stored in the cache instead"""
+        if not self.treeGenerator:
+            return
+        for tree, geometry in self.treeGenerator.collect():
+            if tree in self.visibleTrees:
+                tree.setGeometry(geometry)
+            else:
+                self.treeGeometry.put(tree.treeId, geometry, tree.getGeometryBytes(geometry))
+
+    def releaseTreeGeometry(self, tree):
+        """Move an off-screen tree's geometry into the cache; it is only dropped under memory pressure"""
+        if tree.isGenerated:
+            self.treeGeometry.put(tree.treeId, tree.getGeometry(), tree.getGeometryBytes())
+        tree.isGenerated = False
+        tree.clearGeometry()
+
+    def setTreeGeometryBudget(self, maxBytes):
+        self.treeGeometry.setMaxBytes(maxBytes)
+
+    #====Fixed Timestep Loop====
+    def setSimulationRate(self, simHz):
+        self.simHz = max(1, simHz)
+
+    def setMoveInput(self, dx, dy):
+        """Movement held this frame; applied on every sim step the frame runs"""
+        self.moveInput = (dx, dy)
+
+    def advance(self, realDt):
+        """Run the fixed sim steps owed for realDt seconds and keep the remainder for interpolation"""
+        simDt = 1 / self.simHz
+        self.simAccumulator += max(0.0, realDt)
+        steps = 0
+        while self.simAccumulator >= simDt and steps < self.maxSubsteps:
+            self.step(simDt)
+            self.simAccumulator -= simDt
+            steps += 1
+
+        # too far behind (slow frame, window dragged): drop the backlog instead of spiralling
+        if self.simAccumulator >= simDt:
+            self.simAccumulator %= simDt
+        self.moveInput = None
+        self.renderAlpha = self.simAccumulator / simDt
+        return steps
+
+    def step(self, simDt):
+        """One fixed simulation step"""
+        if self.gameOver:
+            return
+        self.prevCharacterPosition = self.character.getPosition()
+        if self.moveInput:
+            self.character.move(self, *self.moveInput)
+            self.updateCamera()
+
+        self.simTime += simDt
+        self.updateGame(simDt)
+        self.update()
+        self.character.updateAnimation()
+
+    def runSteps(self, steps):
+        """Step the world directly, with no real time involved (benchmarks, soak tests)"""
+        simDt = 1 / self.simHz
+        for _ in range(steps):
+            if self.gameOver:
+                break
+            self.step(simDt)
+
+    def getRenderTime(self):
+        """Sim time being drawn: between the previous and the latest step"""
+        return self.simTime - (1 - self.renderAlpha) / self.simHz
+
+    def getRenderCharacterPosition(self):
+        x, y = self.character.getPosition()
+        if self.prevCharacterPosition is None:
+            return x, y
+        prevX, prevY = self.prevCharacterPosition
+        alpha = self.renderAlpha
+        return prevX + (x - prevX) * alpha, prevY + (y - prevY) * alpha
+
+#====Section debugged by Claude 3.5, very complex, mostly attempted to be written by me, but some details added by Claude====
+    def update(self):
+        """Update game state including texture deterioration and trees"""
+        startRow, startCol, endRow, endCol = self.getVisibleCells()
+        
+        # Check for equipment collection
+        self._checkEquipmentCollection()
+        
+        # Only explore/step chunks in and around the visible area or under a healing effect
+        padding = 2
+        viewRegion = (startRow-padding, startCol-padding, endRow+padding, endCol+padding)
+        self.textureManager.scheduleChunks([viewRegion], self._getHealingRegions())
+        
+        self.textureManager.updateDeterioration(self.character)
+        
+        # Update healing effects
+        self._updateHealingEffects()
+        
+        # Update trees in visible area; trees that just left the view hand their geometry to the cache
+        self.collectTreeGeometry()
+        visible, entered, left = self.updateVisibleTrees(startRow, startCol, endRow, endCol)
+        self.updateTreeHealth(visible)
+        for tree in visible:
+            self.ensureTreeGenerated(tree)
+        for tree in left:
+            tree.needsUpdate = True
+            self.releaseTreeGeometry(tree)
+#====Section debugged by Claude 3.5, very complex, mostly attempted to be written by me, but some details added by Claude====
+
+    def updateGame(self, dt):
+        if not self.gameOver:
+            # Remove statistics tracking from here since it's already in update()
+            if not self.isInfiniteMode:
+                remainingTime = self.gameTime - (self.simTime - self.startTime)
+                deteriorationRatio = self.getCurrentDeterioration()
+                if deteriorationRatio >= 0.8:
+                    self.gameOver = True
+                    self.gameWon = False
+                elif remainingTime <= 0:
+                    self.gameOver = True
+                    self.gameWon = True  # Win if under 80% deterioration when time runs out
+
+    def endGame(self):
+        """Mark game as over without drawing immediately"""
+        self.gameOver = True
+
+    def close(self):
+        """Stop background work before the game is replaced; queued builds are cancelled"""
+        if self.treeGenerator:
+            self.treeGenerator.shutdown()
+            self.treeGenerator = None
+
+    def emitHealingWave(self):
+        currentTime = self.simTime
+        if self.character.canUseHealingWave(currentTime):
+            # Create healing burst effect
+            self.healingBursts.append({
+                'x': self.character.position['x'],
+                'y': self.character.position['y'],
+                'currentRadius': 0,
+                'maxRadius': self.character.healingWave['maxRadius'],
+                'startTime': currentTime,
+                'duration': 1.0,
+                'color': 'lightGreen',
+                'type': 'wave',
+                'healAmount': 0.2,
+                'healedRadius': -1.0,
+                'baseOpacity': 20
+            })
+            
+            # Store the current deterioration level before healing
+            currentDet = self.getCurrentDeterioration()
+            
+            # Apply healing through texture manager
+            self.textureManager.applyGlobalHealing(0.2)
+            
+            # Update statistics after healing (if in infinite mode)
+            if self.isInfiniteMode:
+                self.statistics['deterioration'].append(self.getCurrentDeterioration())
+                self.statistics['timestamps'].append(currentTime - self.startTime)
+            
+            # Start cooldown
+            self.character.healingWave['lastUsed'] = currentTime
+            return True
+        return False
+
+    def _checkEquipmentCollection(self):
+        charX, charY = self.character.getPosition()
+        char_size = self.character.visual['baseSize']
+        
+        # Only equipment in the buckets around the character can be in reach
+        for equip in self.equipment.queryRadius(charX, charY, char_size):
+            if not equip.collected:
+                try:
+                    equip_type = equip.type
+                    bonuses = equip.getBonuses()
+                    
+                    equip.collected = True
+                    self.equipment.remove(equip)
+                    
+                    if equip_type == 'burst':
+                        self._applyBurstHeal(equip.x, equip.y, bonuses)
+                    else:
+                        if equip_type in self.inventory:
+                            self.inventory[equip_type]['count'] += 1
+                            if equip_type == 'radius':
+                                # Ensure the radius bonus is applied correctly
+                                bonus = bonuses.get('radius_bonus', 1.0)  # Default bonus if not specified
+                                self.character.restorationRadiusMultiplier += bonus
+                                self.inventory[equip_type]['total_bonus'] += bonus
+                            elif equip_type == 'power':
+                                bonus = bonuses.get('strength_bonus', 0.75)
+                                self.character.strength += bonus
+                                self.inventory[equip_type]['total_bonus'] += bonus
+                            elif equip_type == 'speed':
+                                bonus = bonuses.get('speed_bonus', 0.2)
+                                self.character.setSpeed(self.character.speed + bonus)
+                                self.inventory[equip_type]['total_bonus'] += bonus
+                except Exception as e:
+                    print(f"Error collecting equipment: {e}")
+                    continue
+
+    def _applyBurstHeal(self, x, y, bonuses):
+        """Apply burst heal with reduced radius and matching visuals"""
+        if 'heal_radius' not in bonuses or 'heal_amount' not in bonuses:
+            print("Invalid burst bonuses")
+            return
+            
+        radius = bonuses['heal_radius']  # Now much smaller (2 cells in each direction)
+        healing = bonuses['heal_amount']
+        
+        # Create burst visual effect
+        current_time = self.simTime
+        self.healingBursts.append({
+            'x': x,
+            'y': y,
+            'currentRadius': 0,
+            'maxRadius': radius * self.baseCellWidth * 2,  # Visual radius matches gameplay radius
+            'startTime': current_time,
+            'duration': 0.6,  # Faster animation for smaller radius
+            'color': 'yellow',
+            'type': 'burst',
+            'healAmount': healing,
+            'healedRadius': -1.0,
+            'baseOpacity': 70
+        })
+        
+        # Apply strong healing to the 5x5 area in one write
+        center_col = int(x / self.baseCellWidth)
+        center_row = int(y / self.baseCellHeight)
+        self.textureManager.healing.healSquare(center_row, center_col, radius, healing)
+
+    def _updateHealingBursts(self):
+        currentTime = self.simTime
+        active_bursts = []
+        
+        for burst in self.healingBursts:
+            if currentTime - burst['startTime'] < burst['duration']:
+                # Update radius
+                progress = (currentTime - burst['startTime']) / burst['duration']
+                burst['currentRadius'] = burst['maxRadius'] * (0.5 - 0.5 * math.cos(progress * math.pi))
+                active_bursts.append(burst)
+                
+        self.healingBursts = active_bursts
+
+    def _updateHealingEffects(self):
+        active_bursts = []
+        rings = []
+        currentTime = self.simTime
+        
+        for burst in self.healingBursts:
+            progress = min(1.0, (currentTime - burst['startTime']) / burst['duration'])
+            currentRadius = burst['maxRadius'] * (0.5 - 0.5 * math.cos(progress * math.pi))
+            
+            # Heal only the ring the front swept since last tick (the last tick finishes it out to maxRadius)
+            rings.append((burst['x'], burst['y'], burst['maxRadius'],
+                          burst['healedRadius'], currentRadius, burst['healAmount']))
+            burst['healedRadius'] = currentRadius
+            burst['currentRadius'] = currentRadius
+            if progress < 1.0:
+                active_bursts.append(burst)
+        
+        # All bursts land in one array write
+        self.textureManager.healing.healRings(rings)
+        self.healingBursts = active_bursts
+
+    def _getHealingRegions(self):
+        """Cell bounding boxes of active healing bursts"""
+        regions = []
+        for burst in self.healingBursts:
+            radius = burst.get('currentRadius', 0)
+            regions.append((int((burst['y'] - radius) / self.baseCellHeight),
+                            int((burst['x'] - radius) / self.baseCellWidth),
+                            int((burst['y'] + radius) / self.baseCellHeight) + 1,
+                            int((burst['x'] + radius) / self.baseCellWidth) + 1))
+        return regions
+
+    def getEquipmentInView(self, startRow, startCol, endRow, endCol):
+        """Uncollected equipment inside a cell range, e.g. the one from getVisibleCells"""
+        return self.equipment.queryRect(startCol * self.baseCellWidth, startRow * self.baseCellHeight,
+                                        endCol * self.baseCellWidth, endRow * self.baseCellHeight)
+
+    def getSurroundingTerrainHealth(self, worldX, worldY):
+        # Convert world coordinates to grid position
+        col = int(worldX / self.baseCellWidth)
+        row = int(worldY / self.baseCellHeight)
+
+        # Average the 3x3 neighbourhood (clipped to the world); unexplored cells count as dead
+        stats = self.textureManager.getRegionStats(row - 1, col - 1, row + 2, col + 2, fill=1.0)
+        return stats['mean'] if stats else None
+
+    def isTerrainWalkable(self, worldX, worldY):
+        # Convert world coordinates to grid position
+        col = int(worldX / self.baseCellWidth)
+        row = int(worldY / self.baseCellHeight)
+        
+        # Check bounds
+        if not self._isValidCell(row, col):
+            return False
+        
+        # Check if water
+        cellData = self.grid[row][col]
+        if cellData['terrain'] == 'water':
+            return False
+        
+        # Check deterioration level
+        lifeRatio = self.textureManager.cellStates.get((row, col))
+        if lifeRatio is not None and lifeRatio >= 0.8:
+            return False
+        
+        return True
+
+    def getCurrentDeterioration(self):
+        """Calculate current average deterioration level across the map"""
+        return self.textureManager.calculateGlobalDeterioration()  # Returns value between 0 and 1
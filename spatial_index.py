@@ -0,0 +1,91 @@
+'''
+====Spatial Grid Index====
+Uniform bucket grid over world coordinates for point-like objects
+(equipment, trees). Each bucket is a dict, so insert/remove/move are O(1)
+and a query only looks at the buckets overlapping the query area:
+
+    grid = SpatialGrid(80, 64)
+    grid.insert(item, x, y)
+    grid.queryRect(left, top, right, bottom)   -> items inside the rectangle
+    grid.queryRadius(x, y, radius)             -> items closer than radius
+    grid.remove(item)
+
+Queries return lists, so it is safe to remove items while walking a result.
+'''
+
+class SpatialGrid:
+    def __init__(self, bucketWidth, bucketHeight):
+        self.bucketWidth = bucketWidth
+        self.bucketHeight = bucketHeight
+        self.buckets = {}    # (bucketCol, bucketRow) -> {item: (x, y)}
+        self.positions = {}  # item -> (x, y, bucketKey)
+
+    def _bucketKey(self, x, y):
+        return int(x // self.bucketWidth), int(y // self.bucketHeight)
+
+    def insert(self, item, x, y):
+        if item in self.positions:
+            self.remove(item)
+        key = self._bucketKey(x, y)
+        self.buckets.setdefault(key, {})[item] = (x, y)
+        self.positions[item] = (x, y, key)
+
+    def remove(self, item):
+        entry = self.positions.pop(item, None)
+        if entry is None:
+            return False
+        bucket = self.buckets[entry[2]]
+        del bucket[item]
+        if not bucket:
+            del self.buckets[entry[2]]
+        return True
+
+    def move(self, item, x, y):
+        entry = self.positions.get(item)
+        if entry is not None and self._bucketKey(x, y) == entry[2]:
+            self.buckets[entry[2]][item] = (x, y)
+            self.positions[item] = (x, y, entry[2])
+        else:
+            self.insert(item, x, y)
+
+    def getPosition(self, item):
+        entry = self.positions.get(item)
+        return entry[:2] if entry else None
+
+    def clear(self):
+        self.buckets.clear()
+        self.positions.clear()
+
+    def queryRect(self, left, top, right, bottom):
+        """Items with left <= x <= right and top <= y <= bottom"""
+        firstCol, firstRow = self._bucketKey(left, top)
+        lastCol, lastRow = self._bucketKey(right, bottom)
+        found = []
+        for bucketRow in range(firstRow, lastRow + 1):
+            for bucketCol in range(firstCol, lastCol + 1):
+                bucket = self.buckets.get((bucketCol, bucketRow))
+                if not bucket:
+                    continue
+                for item, (x, y) in bucket.items():
+                    if left <= x <= right and top <= y <= bottom:
+                        found.append(item)
+        return found
+
+    def queryRadius(self, x, y, radius):
+        """Items strictly closer than radius to (x, y)"""
+        radiusSq = radius * radius
+        found = []
+        for item in self.queryRect(x - radius, y - radius, x + radius, y + radius):
+            itemX, itemY = self.positions[item][:2]
+            if (itemX - x) ** 2 + (itemY - y) ** 2 < radiusSq:
+                found.append(item)
+        return found
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __iter__(self):
+        return iter(list(self.positions))
@@ -0,0 +1,180 @@
+from cmu_graphics import *
+from PIL import Image, ImageDraw
+import numpy as np
+from byte_cache import ByteLRUCache
+
+'''
+====Terrain Tiles====
+Land is drawn as pre-composited tiles of tileSize x tileSize cells (one
+drawImage each) instead of one drawImage per cell. A tile is keyed by
+(tileRow, tileCol, cellWidth, cellHeight) in texture pixels (the snapped
+texture size, see texture_manager.py) and remembers the signature it was
+built from, one int per cell:
+
+    signature = lifeRatio bucket + (buckets + 1) * unwalkable
+
+where bucket = floor(lifeRatio * buckets). Every frame the signatures of
+the visible tiles are recomputed from the cell store in one array pass;
+a tile is only touched when its signature changed, and then only the
+cells whose signature changed are pasted again. Cells deteriorate every
+tick, so the bucket is deliberately coarser than the old per-cell cache
+(round(lifeRatio, 2)); saturated and untouched areas never rebuild.
+
+A cell pasted with a flat fallback because its terrain wasn't baked yet
+is marked provisional and pasted again once the texture is ready, even
+if its signature didn't change.
+
+Water is animated, so water cells are left transparent in the tiles and
+still drawn per cell on top. Tiles are evicted least-recently-used once
+they pass maxBytes (a PIL copy plus the canvas copy, 8 bytes per pixel).
+'''
+
+class TerrainTileCache:
+    # matches Simulation.isTerrainWalkable
+    unwalkableRatio = 0.8
+
+    def __init__(self, textureManager, cellWidth=10, cellHeight=8, tileSize=8, buckets=20,
+                 maxBytes=64 * 1024 * 1024):
+        self.textureManager = textureManager
+        self.cellWidth = cellWidth
+        self.cellHeight = cellHeight
+        self.tileSize = tileSize
+        self.buckets = buckets
+        self.tiles = ByteLRUCache(maxBytes)
+        self.terrainNames = []
+        self.terrainIds = None
+        self.waterMask = None
+        self.built = 0
+        self.patched = 0
+        self.drawn = 0
+
+    def setGrid(self, grid):
+        """Terrain ids per cell from the game grid; drops every tile"""
+        names = {}
+        self.terrainIds = np.array([[names.setdefault(cell['terrain'], len(names)) for cell in row]
+                                    for row in grid], dtype=np.int16)
+        self.terrainNames = list(names)
+        self.waterMask = self.terrainIds == names.get('water', -1)
+        self.tiles.clear()
+
+    def getSignatures(self, rows, cols):
+        """Signature per cell of a block, see the module notes"""
+        states = self.textureManager.cellStates
+        lifeRatio = states.current(rows, cols)
+        initialized = states.terrainIds[rows, cols] != states.UNINITIALIZED
+        buckets = np.floor(np.clip(lifeRatio, 0.0, 1.0) * self.buckets).astype(np.int32)
+        unwalkable = initialized & (lifeRatio >= self.unwalkableRatio)
+        return buckets + (self.buckets + 1) * unwalkable
+
+    def _ensureInitialized(self, rows, cols):
+        # the per-cell path initialized cells on first draw; keep that for tiles at the view edge
+        states = self.textureManager.cellStates
+        missing = np.argwhere(states.terrainIds[rows, cols] == states.UNINITIALIZED)
+        for row, col in missing.tolist():
+            row, col = row + rows.start, col + cols.start
+            self.textureManager.initializeCellState(row, col, self.terrainNames[self.terrainIds[row, col]])
+
+    def getTile(self, tileRow, tileCol, cellWidth, cellHeight):
+        """CMUImage of a tile at this cell size, rebuilt or patched if its cells changed"""
+        states = self.textureManager.cellStates
+        size = self.tileSize
+        rows = slice(tileRow * size, min(states.worldHeight, (tileRow + 1) * size))
+        cols = slice(tileCol * size, min(states.worldWidth, (tileCol + 1) * size))
+        self._ensureInitialized(rows, cols)
+        signature = self.getSignatures(rows, cols)
+
+        key = (tileRow, tileCol, cellWidth, cellHeight)
+        terrainIds = self.terrainIds[rows, cols]
+        tile = self.tiles.get(key)
+        if tile is None:
+            image = Image.new('RGBA', (signature.shape[1] * cellWidth, signature.shape[0] * cellHeight),
+                              (0, 0, 0, 0))
+            changed = np.ones(signature.shape, dtype=bool)
+            provisional = np.zeros(signature.shape, dtype=bool)
+            self.built += 1
+        else:
+            provisional = tile['provisional']
+            changed = tile['signature'] != signature
+            if provisional.any():
+                changed |= provisional & self._getReadyMask(terrainIds, cellWidth, cellHeight)
+            if not changed.any():
+                return tile['cmuImage']
+            image = tile['image']
+            self.patched += 1
+
+        draw = ImageDraw.Draw(image)
+        water = self.waterMask[rows, cols]
+        for localRow, localCol in np.argwhere(changed & ~water).tolist():
+            left, top = localCol * cellWidth, localRow * cellHeight
+            code = int(signature[localRow, localCol])
+            bucket, unwalkable = code % (self.buckets + 1), code // (self.buckets + 1)
+            terrainType = self.terrainNames[terrainIds[localRow, localCol]]
+            provisional[localRow, localCol] = (terrainType in self.textureManager.textures and
+                not self.textureManager.isTextureReady(terrainType, cellWidth, cellHeight))
+            texture = self.textureManager.getTerrainImage(terrainType, cellWidth, cellHeight,
+                                                          bucket / self.buckets)
+            if texture is None:
+                # no texture for this terrain: leave the cell empty like the per-cell path did
+                draw.rectangle((left, top, left + cellWidth - 1, top + cellHeight - 1), fill=(0, 0, 0, 0))
+                continue
+            image.paste(texture, (left, top))
+            if unwalkable:
+                draw.rectangle((left, top, left + cellWidth - 1, top + cellHeight - 1),
+                               outline=(0, 0, 0, 255), width=2)
+
+        tile = {'signature': signature, 'provisional': provisional, 'image': image,
+                'cmuImage': CMUImage(image)}
+        self.tiles.put(key, tile, image.width * image.height * 8)
+        return tile['cmuImage']
+
+    def _getReadyMask(self, terrainIds, cellWidth, cellHeight):
+        """Cells of a block whose terrain texture is baked at this cell size"""
+        ready = np.array([self.textureManager.isTextureReady(name, cellWidth, cellHeight)
+                          for name in self.terrainNames], dtype=bool)
+        return ready[terrainIds]
+
+    def draw(self, game, startRow, startCol, endRow, endCol):
+        """Draw the land tiles overlapping the cell range; returns how many were drawn"""
+        if self.terrainIds is None:
+            return 0
+        zoom = game.zoomLevel
+        # tiles are composited at the snapped texture size and stretched to the zoom
+        cellWidth, cellHeight = self.textureManager.getTextureSize(zoom)
+        states = self.textureManager.cellStates
+        size = self.tileSize
+        firstRow, firstCol = max(0, startRow) // size, max(0, startCol) // size
+        lastRow = (min(states.worldHeight, endRow) - 1) // size
+        lastCol = (min(states.worldWidth, endCol) - 1) // size
+
+        drawn = 0
+        for tileRow in range(firstRow, lastRow + 1):
+            for tileCol in range(firstCol, lastCol + 1):
+                rows = min(size, states.worldHeight - tileRow * size)
+                cols = min(size, states.worldWidth - tileCol * size)
+                screenX, screenY = game.worldToScreen(tileCol * size * self.cellWidth,
+                                                      tileRow * size * self.cellHeight)
+                width, height = cols * self.cellWidth * zoom, rows * self.cellHeight * zoom
+                if (screenX + width <= 0 or screenX >= game.windowWidth or
+                        screenY + height <= 0 or screenY >= game.windowHeight):
+                    continue
+                image = self.getTile(tileRow, tileCol, cellWidth, cellHeight)
+                drawImage(image, screenX, screenY, width=width, height=height)
+                drawn += 1
+        self.drawn = drawn
+        return drawn
+
+    def getWaterCells(self, startRow, startCol, endRow, endCol):
+        """(row, col) of water cells in the range; these are not part of the tiles"""
+        if self.waterMask is None:
+            return []
+        rowStart, colStart = max(0, startRow), max(0, startCol)
+        block = self.waterMask[rowStart:max(rowStart, endRow), colStart:max(colStart, endCol)]
+        return [(row + rowStart, col + colStart) for row, col in np.argwhere(block).tolist()]
+
+    def clear(self):
+        self.tiles.clear()
+
+    def getStats(self):
+        stats = self.tiles.getStats()
+        stats.update({'built': self.built, 'patched': self.patched, 'drawn': self.drawn})
+        return stats
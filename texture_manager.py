@@ -1,7 +1,13 @@
-from PIL import Image, ImageEnhance, ImageFilter, ImageOps
+from PIL import Image, ImageColor, ImageEnhance, ImageFilter, ImageOps
 import os
+import io
+import time
+import hashlib
 from cmu_graphics import CMUImage
 import math
+import numpy as np
+from deterioration import DeteriorationModel
+from byte_cache import ByteLRUCache
 '''
 ====Image Cache Implementation Guide:Written by Claude 3.5, implemented by me====
 
@@ -46,6 +52,82 @@ https://www.datacamp.com/tutorial/python-cache-introduction?utm_source=chatgpt.c
 https://opengameart.org/content/pixel-texture-pack
 '''
 
+'''
+====Texture Ladders====
+Instead of blending + resizing a texture the first time each lifeRatio
+bucket shows up, every deterioration level of a terrain at a cell size
+is baked at once:
+
+    ladder[level] = original + (level / (textureLevels - 1)) * (deteriorated - original)
+
+as one float32 lerp over (textureLevels, height, width, 3) after resizing
+both endpoints once, stored as uint8. A lifeRatio maps to the nearest
+level; the default 21 levels are the terrain tiles' 20 lifeRatio buckets
+plus the end point. prebakeLadders() builds every terrain for a cell size up front
+(the game calls it on start and when the zoom changes); anything still
+missing is built on first use. Blending after the resize instead of
+before only differs by rounding and resize overshoot clipping.
+
+====Texture Cache Policy====
+The CMUImages (cache) and the PIL images for terrain tiles (imageCache)
+are byte-bounded LRU caches instead of dicts cleared every 30 updates,
+which threw away every texture twice a second and made the terrain
+flicker while it was rebuilt. Entries count an estimated 8 bytes per
+pixel for a CMUImage (PIL copy plus canvas surface) and 3 for an RGB
+image. Nothing is dropped on a timer; setCellSize() drops the sizes that
+fell out of the keptSizes most recent ones when the zoom changes, and
+setTextureLevels() drops everything.
+
+====Water Frames====
+Water used to be keyed on round(|sin(updateCounter * 0.5)| * 2, 2), a new
+blur radius (GaussianBlur + LANCZOS resize) almost every tick. Instead
+waterFrameCount frames spanning one period of |sin| are built once per
+cell size, frame k blurred with radius |sin(pi * k / waterFrameCount)| * 2,
+and the frame for the current updateCounter is picked by index.
+
+====Asynchronous Misses====
+With asyncMisses on (the game turns it on when it has texture workers) a
+texture whose ladder or water frames aren't baked yet never blocks the
+frame. getTextureForCell returns the nearest cached level of the same
+terrain and size if there is one, else a flat image in the terrain's
+fallback colour (Game.terrainTypes, or the texture's mean colour), and
+records the missing bake in missedTextures. TextureWarmup picks those up
+and builds them on its workers; the exact texture shows up on the first
+frame after it is installed. Once a ladder exists every level is only a
+slice away, so misses no longer depend on how many cells changed level.
+
+====Mipmaps and Snapped Sizes====
+Textures aren't baked at the exact cell size any more. getTextureSize()
+snaps the zoom to the nearest power of textureSizeStep (2 ** 0.25), so
+the 5x-10x zoom range only ever uses five texture sizes and zooming back
+and forth finds them baked; the canvas stretches them to the real cell
+size when drawing. The first ladder baked for a terrain builds its mip
+pyramid (source, then halved down to 1 px, for both endpoints), and a
+ladder resizes from the smallest level still at least the texture size: a cheap
+bilinear resize of less than 2x when shrinking, LANCZOS from the source
+when magnifying (the 32 px sources are magnified at every zoom the game
+allows today).
+
+====Disk Cache====
+Baked ladders are also saved as raw .npy files in .texture_cache/ next to
+this file, named
+
+    v<diskCacheVersion>-<terrain>-<source hash>-<width>x<height>-<levels>.npy
+
+where the source hash is a SHA-1 of the terrain's two PNG files, so an
+edited PNG, another textureLevels or a new cell size just misses. Hashing
+only reads the file bytes; the mip pyramid is built the first time a
+ladder actually has to be baked. Bump diskCacheVersion whenever the
+baking itself changes. Hits are opened with mmap_mode='r', so a warm
+start only maps the files. Files are written to a temp name and renamed,
+so a crash never leaves half a ladder behind. Any disk error falls back
+to baking in memory.
+
+On start pruneDiskCache() deletes files from another version or source
+hash, temp files left by a crash, and then the least recently used files
+until the directory fits in diskCacheBytes (hits refresh a file's mtime).
+'''
+
 terrainNameMap = {
     "path_rocks": "PATHROCKS.png",
     "pavement": "PAVEMENT.png",
@@ -59,30 +141,40 @@ terrainNameMap = {
     "brick": "BRICKS.png",
 }
 
-class TextureManagerOptimized:
-    def __init__(self):
+class TextureManagerOptimized(DeteriorationModel):
+    textureSizeStep = 2 ** 0.25
+    # cell sizes whose textures and ladders survive a zoom change
+    keptSizes = 3
+
+    diskCacheVersion = 1
+    diskCacheBytes = 64 * 1024 * 1024
+
+    def __init__(self, worldWidth=200, worldHeight=150, cellWidth=10, cellHeight=8, textureLevels=21,
+                 cacheBytes=48 * 1024 * 1024, imageCacheBytes=16 * 1024 * 1024, waterFrameCount=8,
+                 diskCache=True):
+        super().__init__(worldWidth, worldHeight, cellWidth, cellHeight)
         self.textures = {} 
         self.deterioratedTextures = {}  
-        self.cache = {}  
-        self.updateCounter = 0  
-        
-        # terrain settings
-        self.terrainAttributes = {
-            "path_rocks": {"updateFrequency": 10, "maxLife": 500},
-            "pavement": {"updateFrequency": 10, "maxLife": 300},
-            "dirt": {"updateFrequency": 10, "maxLife": 200},
-            "water": {"updateFrequency": 10, "maxLife": 300},
-            "tall_grass": {"updateFrequency": 10, "maxLife": 100},
-            "tiny_leaves": {"updateFrequency": 10, "maxLife": 100},
-            "woodtile": {"updateFrequency": 10, "maxLife": 400},
-            "snow": {"updateFrequency": 10, "maxLife": 100},
-            "sand": {"updateFrequency": 10, "maxLife": 500},
-            "brick": {"updateFrequency": 10, "maxLife": 300}
-        }
-        self.cellStates = {} 
-        self.lastUpdateTimes = {}
-        self.deteriorationRate = 0.005
-        self.healingRate = 0.015
+        self.cache = ByteLRUCache(cacheBytes)  # (terrainType, width, height, level) -> CMUImage
+        self.imageCache = ByteLRUCache(imageCacheBytes)  # same key -> PIL image, for terrain tiles
+        self.cellWidth = cellWidth
+        self.cellHeight = cellHeight
+        self.cellSize = None
+        self.recentSizes = []
+        self.mipmaps = {}  # terrainType -> [(original, deteriorated)], largest first
+        self.sourceHashes = {}
+        self.diskCacheDir = None
+        if diskCache:
+            self.diskCacheDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".texture_cache")
+        self.diskHits = 0
+        self.diskWrites = 0
+        self.asyncMisses = False
+        self.missedTextures = set()  # (terrainType, width, height) waiting to be baked
+        self.fallbackColors = {}
+        self.ladders = {}  # (terrainType, width, height) -> uint8 (textureLevels, height, width, 3)
+        self.waterFrames = {}  # (width, height) -> [CMUImage] * waterFrameCount
+        self.waterFrameCount = max(1, waterFrameCount)
+        self.textureLevels = max(2, textureLevels)
         self.loadTextures()
 
     def findTextureDirectory(self):
@@ -110,16 +202,22 @@ class TextureManagerOptimized:
         for terrainName, filename in terrainNameMap.items():
             originalPath = os.path.join(originalDir, filename)
             deterioratedPath = os.path.join(deterioratedDir, filename)
+            digest = hashlib.sha1()
 
             # load original
             if os.path.exists(originalPath):
-                self.textures[terrainName] = Image.open(originalPath).convert("RGB")
+                data = self.readTextureFile(originalPath)
+                digest.update(data)
+                self.textures[terrainName] = Image.open(io.BytesIO(data)).convert("RGB")
             else:
                 print(f"Error: Missing original texture for '{terrainName}'")
 
             # load deteriorated version
+            digest.update(b'|')
             if os.path.exists(deterioratedPath):
-                self.deterioratedTextures[terrainName] = Image.open(deterioratedPath).convert("RGB")
+                data = self.readTextureFile(deterioratedPath)
+                digest.update(data)
+                self.deterioratedTextures[terrainName] = Image.open(io.BytesIO(data)).convert("RGB")
             else:
                 if terrainName in self.textures:
                     self.deterioratedTextures[terrainName] = self.textures[terrainName].copy()
@@ -127,176 +225,362 @@ class TextureManagerOptimized:
                     print(f"Error: Missing deteriorated texture and fallback for '{terrainName}'")
             #====Texture Loading Section:Debugged by Claude 3.5====
 
-    def getCellKey(self, row, col):
-        return f"{row},{col}"
-
-    def initializeCellState(self, row, col, terrainType):
-        key = self.getCellKey(row, col)
-        if key not in self.cellStates:
-            self.cellStates[key] = {
-                'lifeRatio': 0.0,
-                'terrain': terrainType,
-                'lastUpdate': self.updateCounter
-            }
-            self.lastUpdateTimes[key] = self.updateCounter
-        return self.cellStates[key]
-
-    def processCellDeterioration(self, row, col, character=None, elapsedSteps=1):
+            if terrainName in self.textures:
+                self.sourceHashes[terrainName] = digest.hexdigest()[:16]
+
+        self.pruneDiskCache()
+
+    def readTextureFile(self, path):
+        with open(path, 'rb') as file:
+            return file.read()
+
+    #====Mipmaps and Snapped Sizes====
+    def buildMipmaps(self, terrainType):
+        original = self.textures[terrainType]
+        if terrainType in self.deterioratedTextures:
+            deteriorated = self.deterioratedTextures[terrainType]
+        else:
+            deteriorated = ImageOps.grayscale(original).convert("RGB")
+        if deteriorated.size != original.size:
+            deteriorated = deteriorated.resize(original.size, Image.LANCZOS)
+
+        levels = [(original, deteriorated)]
+        while max(original.size) > 1:
+            size = (max(1, original.width // 2), max(1, original.height // 2))
+            original = original.resize(size, Image.LANCZOS)
+            deteriorated = deteriorated.resize(size, Image.LANCZOS)
+            levels.append((original, deteriorated))
+        return levels
+
+    def getMipLevel(self, terrainType, width, height):
+        """(original, deteriorated) of the smallest mip level at least width x height"""
+        levels = self.mipmaps.get(terrainType)
+        if not levels:
+            self.mipmaps[terrainType] = levels = self.buildMipmaps(terrainType)
+        chosen = levels[0]
+        for level in levels[1:]:
+            if level[0].width < width or level[0].height < height:
+                break
+            chosen = level
+        return chosen
+
+    def getTextureSize(self, zoom):
+        """Snapped (width, height) textures are baked at for a zoom level"""
+        steps = math.floor(math.log(max(zoom, 1e-3), self.textureSizeStep) + 0.5)
+        scale = self.textureSizeStep ** steps
+        return max(1, int(self.cellWidth * scale + 0.5)), max(1, int(self.cellHeight * scale + 0.5))
+
+    #====Texture Ladders====
+    def buildLadder(self, terrainType, width, height):
+        """Every deterioration level of a terrain at one size, in one vectorized lerp"""
+        original, deteriorated = self.getMipLevel(terrainType, width, height)
+        magnify = original.width < width or original.height < height
+        resample = Image.LANCZOS if magnify else Image.BILINEAR
+
+        start = np.asarray(original.resize((width, height), resample), dtype=np.float32)
+        end = np.asarray(deteriorated.resize((width, height), resample), dtype=np.float32)
+        weights = np.linspace(0.0, 1.0, self.textureLevels, dtype=np.float32)[:, None, None, None]
+        ladder = start + weights * (end - start)
+        return np.clip(ladder + 0.5, 0, 255).astype(np.uint8)
+
+    def bakeLadder(self, terrainType, width, height):
+        """Ladder from the disk cache, or built and saved there"""
+        ladder = self.loadLadder(terrainType, width, height)
+        if ladder is None:
+            ladder = self.buildLadder(terrainType, width, height)
+            self.saveLadder(terrainType, width, height, ladder)
+        return ladder
+
+    def getLadder(self, terrainType, width, height):
+        key = (terrainType, width, height)
+        if key not in self.ladders:
+            self.ladders[key] = self.bakeLadder(terrainType, width, height)
+        return self.ladders[key]
+
+    #====Disk Cache====
+    def getLadderPath(self, terrainType, width, height):
+        if not self.diskCacheDir or terrainType not in self.sourceHashes:
+            return None
+        name = (f"v{self.diskCacheVersion}-{terrainType}-{self.sourceHashes[terrainType]}-"
+                f"{width}x{height}-{self.textureLevels}.npy")
+        return os.path.join(self.diskCacheDir, name)
+
+    def loadLadder(self, terrainType, width, height):
+        path = self.getLadderPath(terrainType, width, height)
+        if not path or not os.path.exists(path):
+            return None
         try:
-            key = self.getCellKey(row, col)
-            if key not in self.cellStates:
-                return None
-            
-            cell = self.cellStates[key]
-            terrain = cell['terrain']
-
-            # water doesn't deteriorate
-            if terrain == "water":
-                return 0.0
-
-            if terrain not in self.terrainAttributes:
-                print(f"Warning: Missing terrain attributes for {terrain}, using defaults")
-                self.terrainAttributes[terrain] = {"updateFrequency": 10, "maxLife": 300}
-
-            # calculate changes
-            deterioration = self.deteriorationRate * elapsedSteps
-            healing = 0
-            
-            if character:
-                charX, charY = character.getPosition()
-                cellX = col * character.cellWidth + (character.cellWidth / 2)
-                cellY = row * character.cellHeight + (character.cellHeight / 2)
-                
-                distance = math.sqrt((charX - cellX) ** 2 + (charY - cellY) ** 2)
-                restorationRadius = character.getRestorationRadius()
-                
-                if distance <= restorationRadius:
-                    distanceRatio = 1 - (distance / restorationRadius)
-                    healing = self.healingRate * distanceRatio * character.strength * elapsedSteps
-
-            cell['lifeRatio'] = max(0.0, min(1.0, cell['lifeRatio'] + deterioration - healing))
-            self.lastUpdateTimes[key] = self.updateCounter
-            
-            return cell['lifeRatio']
-            
+            ladder = np.load(path, mmap_mode='r')
         except Exception as e:
-            print(f"Error in processCellDeterioration for cell ({row}, {col}): {e}")
-            return 0.0
-
-    def calculateGlobalDeterioration(self):
-        total = 0
-        count = 0
-        for key, cell in self.cellStates.items():
-            if cell['terrain'] != 'water':
-                total += cell['lifeRatio']
-                count += 1
-        return total / count if count > 0 else 0.0
-
-    def applyGlobalHealing(self, healAmount):
-        """Apply percentage-based healing to all deteriorated cells"""
-        healed = False
-        for key, cell in self.cellStates.items():
-            if cell['terrain'] != 'water':
-                old = cell['lifeRatio']
-                # healAmount is now treated as a percentage (0.2 = 20%)
-                # Calculate healing based on current deterioration
-                healing = old * healAmount  # This makes it percentage based
-                cell['lifeRatio'] = max(0.0, old - healing)
-                if cell['lifeRatio'] != old:
-                    healed = True
-        return healed
-
-    def updateDeterioration(self, character=None):
-        self.updateCounter += 1
-        
-        for key in list(self.cellStates.keys()):
-            row, col = map(int, key.split(','))
-            elapsedSteps = self.updateCounter - self.lastUpdateTimes.get(key, 0)
-            
-            if elapsedSteps > 0:
-                self.processCellDeterioration(row, col, character, elapsedSteps)
-
-        # clear cache occasionally
-        if self.updateCounter % 30 == 0:
-            self.cache.clear()
-
-    def blendDeterioratedTexture(self, image, level, terrainType):
+            print(f"Ignoring unreadable texture cache file {path}: {e}")
+            return None
+        if ladder.shape != (self.textureLevels, height, width, 3) or ladder.dtype != np.uint8:
+            return None
         try:
-            if terrainType in self.deterioratedTextures:
-                deteriorated = self.deterioratedTextures[terrainType]
-            else:
-                deteriorated = ImageOps.grayscale(image).convert("RGB")
-            
-            if image.size != deteriorated.size:
-                deteriorated = deteriorated.resize(image.size, Image.LANCZOS)
-                
-            return Image.blend(image, deteriorated, level)
+            os.utime(path)  # recently used, for pruning
+        except OSError:
+            pass
+        self.diskHits += 1
+        return ladder
+
+    def saveLadder(self, terrainType, width, height, ladder):
+        path = self.getLadderPath(terrainType, width, height)
+        if not path:
+            return
+        tempPath = f"{path}.{os.getpid()}.{id(ladder)}.tmp"
+        try:
+            os.makedirs(self.diskCacheDir, exist_ok=True)
+            with open(tempPath, 'wb') as file:
+                np.save(file, ladder)
+            os.replace(tempPath, path)
+            self.diskWrites += 1
         except Exception as e:
-            print(f"Error blending texture for {terrainType}: {e}")
-            return image
+            print(f"Failed to write texture cache file {path}: {e}")
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+
+    def pruneDiskCache(self, staleTempAge=3600):
+        """Delete ladders of other versions or sources, crashed temp files, and the least
+        recently used files past diskCacheBytes; returns how many files were removed"""
+        if not self.diskCacheDir or not os.path.isdir(self.diskCacheDir):
+            return 0
+        current = tuple(f"v{self.diskCacheVersion}-{terrainType}-{sourceHash}-"
+                        for terrainType, sourceHash in self.sourceHashes.items())
+        removed = 0
+        kept = []
+        for name in os.listdir(self.diskCacheDir):
+            path = os.path.join(self.diskCacheDir, name)
+            try:
+                info = os.stat(path)
+                if name.endswith('.tmp'):
+                    # another running game may still be writing a fresh one
+                    stale = time.time() - info.st_mtime > staleTempAge
+                elif name.endswith('.npy'):
+                    stale = not name.startswith(current) if current else False
+                else:
+                    continue
+                if stale:
+                    os.remove(path)
+                    removed += 1
+                elif name.endswith('.npy'):
+                    kept.append((info.st_mtime, info.st_size, path))
+            except OSError as e:
+                print(f"Failed to prune texture cache file {path}: {e}")
+
+        totalBytes = sum(size for _, size, _ in kept)
+        for _, size, path in sorted(kept):
+            if totalBytes <= self.diskCacheBytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+                totalBytes -= size
+            except OSError as e:
+                print(f"Failed to prune texture cache file {path}: {e}")
+        return removed
+
+    def prebakeLadders(self, width, height, terrainTypes=None):
+        """Build the ladders of all (or the given) textured terrains for a cell size ahead of use"""
+        width, height = max(1, width), max(1, height)
+        for terrainType in terrainTypes or list(self.textures):
+            if terrainType in self.textures and terrainType != 'water':
+                try:
+                    self.getLadder(terrainType, width, height)
+                except Exception as e:
+                    print(f"Failed to bake textures for terrain '{terrainType}': {e}")
+
+    def setCellSize(self, width, height):
+        """Make this the current texture size, e.g. after a zoom; drops the textures and
+        ladders of sizes not among the keptSizes most recent"""
+        size = (max(1, width), max(1, height))
+        if size == self.cellSize:
+            return
+        self.cellSize = size
+        if size in self.recentSizes:
+            self.recentSizes.remove(size)
+        self.recentSizes.insert(0, size)
+        del self.recentSizes[self.keptSizes:]
+        isStale = lambda key: key[1:3] not in self.recentSizes
+        self.cache.removeWhere(isStale)
+        self.imageCache.removeWhere(isStale)
+        for key in [key for key in self.ladders if isStale(key)]:
+            del self.ladders[key]
+        for key in [key for key in self.waterFrames if key not in self.recentSizes]:
+            del self.waterFrames[key]
+        self.missedTextures = {key for key in self.missedTextures if not isStale(key)}
+
+    def setCacheBudget(self, cacheBytes, imageCacheBytes=None):
+        self.cache.setMaxBytes(cacheBytes)
+        if imageCacheBytes is not None:
+            self.imageCache.setMaxBytes(imageCacheBytes)
+
+    def setTextureLevels(self, textureLevels):
+        self.textureLevels = max(2, textureLevels)
+        self.ladders.clear()
+        self.clearCache()
+
+    def getLevelIndex(self, lifeRatio):
+        """Nearest ladder level for a lifeRatio"""
+        return int(min(1.0, max(0.0, lifeRatio)) * (self.textureLevels - 1) + 0.5)
+
+    #====Water Frames====
+    def buildWaterFrames(self, width, height):
+        original = self.textures['water']
+        frames = []
+        for frame in range(self.waterFrameCount):
+            blurAmount = abs(math.sin(math.pi * frame / self.waterFrameCount)) * 2
+            blurred = original.filter(ImageFilter.GaussianBlur(radius=blurAmount)) if blurAmount else original
+            frames.append(CMUImage(blurred.resize((width, height), Image.LANCZOS)))
+        return frames
+
+    def getWaterFrames(self, width, height):
+        key = (max(1, width), max(1, height))
+        if key not in self.waterFrames:
+            self.waterFrames[key] = self.buildWaterFrames(*key)
+        return self.waterFrames[key]
+
+    def getWaterFrameIndex(self):
+        """Frame for the current update; |sin(updateCounter * 0.5)| repeats every pi"""
+        phase = (self.updateCounter * 0.5) % math.pi
+        return int(phase / math.pi * self.waterFrameCount) % self.waterFrameCount
+
+    def setWaterFrameCount(self, waterFrameCount):
+        self.waterFrameCount = max(1, waterFrameCount)
+        self.waterFrames.clear()
+        self.missedTextures.clear()
+
+    #====Asynchronous Misses====
+    def isTextureReady(self, terrainType, width, height):
+        if terrainType == 'water':
+            return (width, height) in self.waterFrames
+        return (terrainType, width, height) in self.ladders
+
+    def _requestTexture(self, terrainType, width, height):
+        """True if the texture can be built right now; otherwise queue it for the workers"""
+        if not self.asyncMisses or self.isTextureReady(terrainType, width, height):
+            return True
+        self.missedTextures.add((terrainType, width, height))
+        return False
+
+    def takeMissedTextures(self):
+        missed = self.missedTextures
+        self.missedTextures = set()
+        return missed
+
+    def setFallbackColors(self, colorMap):
+        """Flat colours (cmu/CSS names) shown while a terrain's textures are being baked"""
+        self.fallbackColors = {}
+        for terrainType, color in colorMap.items():
+            try:
+                self.fallbackColors[terrainType] = ImageColor.getrgb(color)[:3]
+            except ValueError:
+                pass
+
+    def getFallbackImage(self, terrainType, width, height):
+        cacheKey = (terrainType, width, height, 'flat')
+        image = self.imageCache.get(cacheKey)
+        if image is None:
+            color = self.fallbackColors.get(terrainType)
+            if color is None:
+                mean = np.asarray(self.textures[terrainType]).reshape(-1, 3).mean(axis=0)
+                color = tuple(int(channel + 0.5) for channel in mean)
+            image = Image.new('RGB', (width, height), color)
+            self.imageCache.put(cacheKey, image, width * height * 3)
+        return image
+
+    def getNearestCachedTexture(self, terrainType, width, height, level):
+        """Closest already-built level of this terrain and size, or None"""
+        for offset in range(1, self.textureLevels):
+            for candidate in (level - offset, level + offset):
+                texture = self.cache.peek((terrainType, width, height, candidate))
+                if texture is not None:
+                    return texture
+        return None
+
+    def getTerrainImage(self, terrainType, width, height, level):
+        """Plain PIL texture at a deterioration level and size, or None if the terrain
+        has no texture. Used to composite terrain tiles; with asyncMisses a terrain that
+        isn't baked yet gets its flat fallback image."""
+        if terrainType not in self.textures:
+            return None
+        if not self._requestTexture(terrainType, width, height):
+            return self.getFallbackImage(terrainType, width, height)
+        cacheKey = (terrainType, width, height, self.getLevelIndex(level))
+        image = self.imageCache.get(cacheKey)
+        if image is None:
+            try:
+                ladder = self.getLadder(terrainType, width, height)
+                image = Image.fromarray(ladder[cacheKey[3]])
+            except Exception as e:
+                print(f"Failed to create texture for terrain '{terrainType}': {e}")
+                return None
+            self.imageCache.put(cacheKey, image, width * height * 3)
+        return image
 
     def getTextureForCell(self, row, col, terrainType, width, height, character=None):
         width = max(1, width)  
         height = max(1, height) 
         try:
-            cellState = self.initializeCellState(row, col, terrainType)
-            lifeRatio = cellState['lifeRatio']
+            lifeRatio = self.initializeCellState(row, col, terrainType)
             
             if terrainType not in self.textures:
                 return None, lifeRatio
 
             # special water effect
             if terrainType == 'water':
-                blurAmount = abs(math.sin(self.updateCounter * 0.5)) * 2
-                cacheKey = (terrainType, width, height, round(blurAmount, 2))
-                
-                if cacheKey not in self.cache:
-                    try:
-                        original = self.textures[terrainType]
-                        blurred = original.filter(ImageFilter.GaussianBlur(radius=blurAmount))
-                        resized = blurred.resize((width, height), Image.LANCZOS)
-                        self.cache[cacheKey] = CMUImage(resized)
-                    except Exception as e:
-                        print(f"Failed to create water texture: {e}")
-                        return None, 0.0
-                
-                return self.cache[cacheKey], 0.0
-
-            # handle other terrain
-            roundedRatio = round(lifeRatio, 2)
-            cacheKey = (terrainType, width, height, roundedRatio)
+                if not self._requestTexture(terrainType, width, height):
+                    return self._getFallbackTexture(terrainType, width, height), 0.0
+                try:
+                    frames = self.getWaterFrames(width, height)
+                except Exception as e:
+                    print(f"Failed to create water texture: {e}")
+                    return None, 0.0
+                return frames[self.getWaterFrameIndex()], 0.0
+
+            # handle other terrain: nearest level of the pre-baked ladder
+            level = self.getLevelIndex(lifeRatio)
+            cacheKey = (terrainType, width, height, level)
+            texture = self.cache.get(cacheKey)
             
-            if cacheKey not in self.cache:
+            if texture is None:
+                if not self._requestTexture(terrainType, width, height):
+                    texture = self.getNearestCachedTexture(terrainType, width, height, level)
+                    return texture or self._getFallbackTexture(terrainType, width, height), lifeRatio
                 try:
-                    original = self.textures[terrainType]
-                    currentTexture = self.blendDeterioratedTexture(original, lifeRatio, terrainType)
-                    resized = currentTexture.resize((width, height), Image.LANCZOS)
-                    self.cache[cacheKey] = CMUImage(resized)
+                    ladder = self.getLadder(terrainType, width, height)
+                    texture = CMUImage(Image.fromarray(ladder[level]))
                 except Exception as e:
                     print(f"Failed to create texture for terrain '{terrainType}': {e}")
                     return None, lifeRatio
+                self.cache.put(cacheKey, texture, width * height * 8)
                     
-            return self.cache[cacheKey], lifeRatio
+            return texture, lifeRatio
 
         except Exception as e:
             print(f"Error in getTextureForCell: {e}")
             return None, 0.0
 
+    def _getFallbackTexture(self, terrainType, width, height):
+        cacheKey = (terrainType, width, height, 'flat')
+        texture = self.cache.get(cacheKey)
+        if texture is None:
+            texture = CMUImage(self.getFallbackImage(terrainType, width, height))
+            self.cache.put(cacheKey, texture, width * height * 8)
+        return texture
+
     def clearCache(self):
         self.cache.clear()
-
-    def setDeteriorationRate(self, rate):
-        self.deteriorationRate = max(0.0, min(0.01, rate))
-
-    def setHealingRate(self, rate):
-        self.healingRate = max(0.0, min(0.02, rate))
-
-    def getTerrainStats(self, row, col):
-        key = self.getCellKey(row, col)
-        if key in self.cellStates:
-            return {
-                'lifeRatio': self.cellStates[key]['lifeRatio'],
-                'terrain': self.cellStates[key]['terrain'],
-                'lastUpdate': self.lastUpdateTimes[key]
-            }
-        return None
+        self.imageCache.clear()
+        self.waterFrames.clear()
+        self.missedTextures.clear()
+
+    def getCacheStats(self):
+        return {
+            'textures': self.cache.getStats(),
+            'images': self.imageCache.getStats(),
+            'ladders': len(self.ladders),
+            'waterFrames': len(self.waterFrames) * self.waterFrameCount,
+            'ladderBytes': sum(ladder.nbytes for ladder in self.ladders.values()),
+            'diskHits': self.diskHits,
+            'diskWrites': self.diskWrites
+        }
@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+
+'''
+====Background Texture Warm-Up====
+Bakes the texture ladders (and water frames) for the terrains on the map
+at the current cell size on worker threads, so a new map or a zoom step
+doesn't pay for every texture on its first frames. Like the tree pool the
+workers only build; the main thread installs:
+
+    warmup.start(terrainTypes, width, height)  -> one job per terrain
+    warmup.collect()                            -> install finished jobs, each frame
+    warmup.getProgress()                        -> 0.0 .. 1.0, for the loading label
+
+bakeLadder and buildWaterFrames only read the loaded source images (and
+the ladder disk cache), and the NumPy lerp, PIL resize/blur and file I/O
+release the GIL, so the jobs really run in parallel. Results for a cell
+size the game has zoomed away from are dropped. collect() also queues the
+textures the texture manager missed since the last frame (see
+Asynchronous Misses in texture_manager.py).
+'''
+
+class TextureWarmup:
+    def __init__(self, textureManager, maxWorkers=2):
+        self.textureManager = textureManager
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers,
+                                           thread_name_prefix='texture-warmup')
+        self.pending = {}  # (terrainType, width, height) -> future
+        self.total = 0
+        self.completed = 0
+        self.installed = 0
+        self.discarded = 0
+
+    def start(self, terrainTypes, width, height):
+        """Bake every textured terrain in terrainTypes at this cell size in the background"""
+        self.clear()
+        for terrainType in sorted(set(terrainTypes)):
+            self.request(terrainType, max(1, width), max(1, height))
+
+    def request(self, terrainType, width, height):
+        manager = self.textureManager
+        key = (terrainType, width, height)
+        if (key in self.pending or terrainType not in manager.textures or
+                manager.isTextureReady(*key)):
+            return
+        if terrainType == 'water':
+            future = self.executor.submit(manager.buildWaterFrames, width, height)
+        else:
+            future = self.executor.submit(manager.bakeLadder, terrainType, width, height)
+        self.pending[key] = future
+        self.total += 1
+
+    def collect(self):
+        """Install the jobs that finished since the last call and queue new misses;
+        returns how many were installed"""
+        manager = self.textureManager
+        installed = 0
+        for key, future in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[key]
+            self.completed += 1
+            if future.cancelled():
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Texture warm-up failed for terrain '{key[0]}': {e}")
+                continue
+            if manager.cellSize is not None and manager.cellSize != key[1:]:
+                self.discarded += 1
+                continue
+            if key[0] == 'water':
+                manager.waterFrames.setdefault(key[1:], result)
+            else:
+                manager.ladders.setdefault(key, result)
+            installed += 1
+        self.installed += installed
+
+        for key in manager.takeMissedTextures():
+            self.request(*key)
+        return installed
+
+    def isComplete(self):
+        return not self.pending
+
+    def getProgress(self):
+        return self.completed / self.total if self.total else 1.0
+
+    def clear(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.total = 0
+        self.completed = 0
+
+    def shutdown(self):
+        self.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def getStats(self):
+        return {
+            'pending': len(self.pending),
+            'progress': self.getProgress(),
+            'installed': self.installed,
+            'discarded': self.discarded
+        }
@@ -1,6 +1,8 @@
-from cmu_graphics import *
+from graphics import *
 import random
+import itertools
 from math import sin, cos, radians
+import numpy as np
 
 '''
 ====AI Assistance Summary====
@@ -17,6 +19,34 @@ The following features were implemented with Claude 3.5's help:
    - Size and angle variation
 '''
 
+'''
+====Tree Geometry Layout====
+Branches and leaves are kept as structure-of-arrays (dicts of NumPy arrays)
+instead of one dict per branch/leaf:
+
+    branches: x0, y0, x1, y1, thickness, depth   sorted by depth (draw order)
+    leaves:   x, y, size, angle, color, fallRank  sorted by y (draw order)
+
+Both orders are fixed when the geometry is generated, so drawing never
+sorts. Leaf fall is a permutation picked at generation time: fallRank is
+each leaf's position in it, and the visible leaves are exactly those with
+fallRank < visibleLeafCount, so shedding leaves is just lowering a count.
+
+All randomness comes from the tree's own random.Random instances, never
+the shared module state: rng (seeded with the tree's seed) draws the style
+and the per-layer seeds in order, and the layout pass uses a fresh
+generator seeded from (seed, layers). The geometry is therefore a pure
+function of (seed, layers, leaf colour stage), which is what lets trees
+with the same seed share one cached impostor image.
+
+Growing and building are separate: growLayer() only draws the next
+layer's seeds (cheap, on the caller's thread), buildGeometry() runs the
+recursion into a fresh geometry dict without touching the tree, and
+setGeometry() installs it. buildGeometry can therefore run on a worker
+thread while the tree keeps drawing its previous geometry. layers is how
+far the tree has grown, geometryLayers what its current geometry shows.
+'''
+
 class Tree:
     maxLayers = 4
     minLeavesPerBranch = 2
@@ -29,15 +59,24 @@ class Tree:
     baseTrunkLength = 20
     scale = 0.4
 
+    branchParamNames = ('angleVar', 'lengthVar', 'branchingAngle', 'curve', 'extraBranch')
+
     growthPhaseEnd = 0.5
     colorChangeStart = 0.5
     colorChangeEnd = 0.7
     leafFallStart = 0.7
     leafFallEnd = 1.0
 
+    # visible-leaf fraction is quantized into this many steps for the stage
+    leafBuckets = 8
+
+    # stable ids for geometry caches (object ids get reused after respawns)
+    _ids = itertools.count()
+
     def __init__(self, baseX, baseY, seed=None, leafDensity=0.4, startLeafLayer=3):
         self.seed = seed if seed else random.randint(0, 10000)
-        random.seed(self.seed)
+        self.rng = random.Random(self.seed)
+        self.treeId = next(Tree._ids)
         
         self.isGenerated = False
         self.needsUpdate = True
@@ -45,8 +84,7 @@ class Tree:
         self.baseY = baseY
         self.scale = self.scale
         self.layers = 0
-        self.branches = []
-        self.leaves = []
+        self.clearGeometry()
         self.branchSeeds = []
         self.leafSeeds = []
         self.maxStoredLayers = 0
@@ -55,7 +93,6 @@ class Tree:
         self.startLeafLayer = startLeafLayer
         self.lifeRatio = 0.0
         self.targetLayers = 0
-        self.visibleLeaves = set()
         
         self.leafColors = {
             'green': ['forestGreen', 'green', 'darkGreen'],
@@ -63,64 +100,181 @@ class Tree:
             'red': ['crimson', 'red', 'darkRed']
         }
         
+        self.colorStage = 'green'
+        self.leafColorStage = 'green'
+        
+        rng = self.rng
         self.treeStyle = {
-            'leafDensity': random.uniform(1, 2) * self.leafDensity,
-            'leafSize': random.uniform(1.8, 2.5),
+            'leafDensity': rng.uniform(1, 2) * self.leafDensity,
+            'leafSize': rng.uniform(1.8, 2.5),
             'leafColors': self.leafColors['green'],
-            'branchStyle': random.uniform(2, 2.5)
+            'branchStyle': rng.uniform(2, 2.5)
         }
+        
+        # impostor images are keyed on this (see tree_impostor.py)
+        self.stage = self.getStage()
 
     def ensureGenerated(self):
-        if not self.isGenerated:
-            random.seed(self.seed)
-            self.addLayer()
-            self.isGenerated = True
+        """Build geometry synchronously if it is missing or behind the tree's growth"""
+        if self.needsGeometry():
+            # a new tree starts with one layer; otherwise rebuild the layers it already has
+            if not self.layers:
+                self.growLayer()
+            self.generateBranches()
+
+    def needsGeometry(self):
+        return (not self.isGenerated or self.geometryLayers != self.layers or
+                self.leafColorStage != self.colorStage)
 
     def generateRandomBranchParams(self):
+        rng = self.rng
         return {
-            'angleVar': random.uniform(-15, 15) * self.treeStyle['branchStyle'],
-            'lengthVar': random.uniform(0.85, 1.15),
-            'branchingAngle': random.uniform(20, 35) * self.treeStyle['branchStyle'],
-            'curve': random.uniform(-15, 15),
-            'extraBranch': random.random() < 0.3
+            'angleVar': rng.uniform(-15, 15) * self.treeStyle['branchStyle'],
+            'lengthVar': rng.uniform(0.85, 1.15),
+            'branchingAngle': rng.uniform(20, 35) * self.treeStyle['branchStyle'],
+            'curve': rng.uniform(-15, 15),
+            'extraBranch': rng.random() < 0.3
         }
 
     def generateRandomLeafParams(self):
+        rng = self.rng
         return {
-            'size': random.uniform(15, 30) * self.treeStyle['leafSize'],
-            'angle': random.uniform(-45, 45),
-            'color': random.choice(self.treeStyle['leafColors']),
-            'offset': random.uniform(-2, 2)
+            'size': rng.uniform(15, 30) * self.treeStyle['leafSize'],
+            'angle': rng.uniform(-45, 45),
+            'color': rng.choice(self.treeStyle['leafColors']),
+            'offset': rng.uniform(-2, 2)
         }
 
     def addLayer(self):
+        if self.growLayer():
+            self.generateBranches()
+
+    def growLayer(self):
+        """Draw the seeds for one more layer; the geometry is rebuilt separately"""
         if self.layers >= self.maxLayers:
-            return
+            return False
             
+        # seeds are packed into arrays: one row of branchParamNames per branch, one size per leaf
         layerSeeds = []
         numBranches = 2 ** self.layers
         for _ in range(max(1, numBranches)):
-            layerSeeds.append(self.generateRandomBranchParams())
-        self.branchSeeds.append(layerSeeds)
+            params = self.generateRandomBranchParams()
+            layerSeeds.append([params[name] for name in self.branchParamNames])
+        self.branchSeeds.append(np.array(layerSeeds, dtype=np.float64))
         
         leafLayerSeeds = []
         numLeaves = 2 ** (self.layers + 3)
         for _ in range(numLeaves):
-            leafLayerSeeds.append(self.generateRandomLeafParams())
-        self.leafSeeds.append(leafLayerSeeds)
+            leafLayerSeeds.append(self.generateRandomLeafParams()['size'])
+        self.leafSeeds.append(np.array(leafLayerSeeds, dtype=np.float64))
         
         self.layers += 1
         self.maxStoredLayers = max(self.maxStoredLayers, self.layers)
-        self.generateBranches()
+        return True
+
+    def clearGeometry(self):
+        self.geometryLayers = 0
+        self.extent = 0.0
+        self.centerX = self.centerY = 0.0
+        self.branches = {}
+        self.leaves = {}
+        self.leafPalette = []
+        self.branchCount = 0
+        self.leafCount = 0
+        self.visibleLeafCount = 0
+
+    def getGeometry(self):
+        """Everything generateBranches produced, for a geometry cache"""
+        return {
+            'geometryLayers': self.geometryLayers,
+            'extent': self.extent, 'centerX': self.centerX, 'centerY': self.centerY,
+            'branches': self.branches, 'leaves': self.leaves,
+            'leafPalette': self.leafPalette, 'leafColorStage': self.leafColorStage,
+            'branchCount': self.branchCount, 'leafCount': self.leafCount,
+            'visibleLeafCount': self.visibleLeafCount
+        }
+
+    def setGeometry(self, geometry):
+        for name, value in geometry.items():
+            setattr(self, name, value)
+        self.isGenerated = True
+        # fresh geometry has every leaf; shed the ones the current lifeRatio has already dropped
+        self._updateLeafAppearance()
+        self._updateStage()
+
+    def getGeometryBytes(self, geometry=None):
+        geometry = geometry or self.getGeometry()
+        return (sum(array.nbytes for array in geometry['branches'].values()) +
+                sum(array.nbytes for array in geometry['leaves'].values()))
 
     def generateBranches(self):
-        self.branches = []
-        self.leaves = []
-        self.visibleLeaves = set()
-        self._addBranch(self.baseX, self.baseY, self.baseTrunkLength, -90, 0, 0)
-        
-        for i in range(len(self.leaves)):
-            self.visibleLeaves.add(i)
+        self.setGeometry(self.buildGeometry())
+
+    def buildGeometry(self, layers=None, colorStage=None):
+        """Geometry for the first `layers` layers as a dict for setGeometry. Only reads
+        the tree (seeds and style), so it is safe to run off the main thread."""
+        layers = self.layers if layers is None else layers
+        colorStage = self.colorStage if colorStage is None else colorStage
+        # rows are collected while recursing, then packed into arrays once
+        build = {
+            'layers': layers,
+            'rng': random.Random(self.seed * (self.maxLayers + 1) + layers),
+            'palette': list(self.leafColors[colorStage]),
+            'branchRows': [],
+            'leafRows': []
+        }
+        self._addBranch(build, self.baseX, self.baseY, self.baseTrunkLength, -90, 0, 0)
+        geometry = self._packGeometry(build)
+        geometry['leafColorStage'] = colorStage
+        return geometry
+
+    def _packGeometry(self, build):
+        branchRows = sorted(build['branchRows'], key=lambda row: row[5])  # by depth
+        branchData = np.array(branchRows, dtype=np.float32).reshape(-1, 6)
+        branches = {
+            'x0': branchData[:, 0], 'y0': branchData[:, 1],
+            'x1': branchData[:, 2], 'y1': branchData[:, 3],
+            'thickness': branchData[:, 4],
+            'depth': branchData[:, 5].astype(np.int8)
+        }
+
+        leafRows = sorted(build['leafRows'], key=lambda row: row[1])  # by y
+        leafData = np.array(leafRows, dtype=np.float32).reshape(-1, 5)
+        leafCount = len(leafRows)
+        # fall order is fixed per tree and doesn't touch the shared random state
+        fallOrder = np.random.default_rng(self.seed + build['layers']).permutation(leafCount)
+        fallRank = np.empty(leafCount, dtype=np.int32)
+        fallRank[fallOrder] = np.arange(leafCount, dtype=np.int32)
+        leaves = {
+            'x': leafData[:, 0], 'y': leafData[:, 1],
+            'size': leafData[:, 2], 'angle': leafData[:, 3],
+            'color': leafData[:, 4].astype(np.int8),
+            'fallRank': fallRank
+        }
+
+        # bounding box of branch ends and leaf centres, relative to the base (for LOD and blobs)
+        xs = np.concatenate((branchData[:, 0], branchData[:, 2], leafData[:, 0])) - self.baseX
+        ys = np.concatenate((branchData[:, 1], branchData[:, 3], leafData[:, 1])) - self.baseY
+        extent = centerX = centerY = 0.0
+        if len(xs):
+            extent = float(max(xs.max() - xs.min(), ys.max() - ys.min()))
+            centerX = float(xs.max() + xs.min()) / 2
+            centerY = float(ys.max() + ys.min()) / 2
+
+        return {
+            'geometryLayers': build['layers'],
+            'extent': extent, 'centerX': centerX, 'centerY': centerY,
+            'branches': branches, 'leaves': leaves,
+            'leafPalette': build['palette'],
+            'branchCount': len(branchRows), 'leafCount': leafCount,
+            'visibleLeafCount': leafCount
+        }
+
+    def getVisibleLeafIndices(self):
+        """Indices (in y order) of leaves that haven't fallen"""
+        if not self.leafCount:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero(self.leaves['fallRank'] < self.visibleLeafCount)
 
     #====Recursive Tree Branch Generation:Original Code written individually but debugged by Claude 3.5 due to complexity====
     '''
@@ -129,133 +283,140 @@ class Tree:
     Layer 1:    / \     (2 branches)
     Layer 2:   / \ / \  (4 branches)
     '''
-    def _addBranch(self, startX, startY, length, angle, depth, branchIndex):
-        if depth >= self.layers or length < 2:
+    def _addBranch(self, build, startX, startY, length, angle, depth, branchIndex):
+        if depth >= build['layers'] or length < 2:
             return
 
-        params = self.branchSeeds[depth][min(branchIndex, len(self.branchSeeds[depth])-1)]
-        curvedAngle = angle + params['curve'] * 0.5
+        angleVar, lengthVar, branchingAngle, curve, extraBranch = \
+            self.branchSeeds[depth][min(branchIndex, len(self.branchSeeds[depth])-1)].tolist()
+        curvedAngle = angle + curve * 0.5
         scaledLength = length * self.scale
         
         endX = startX + scaledLength * cos(radians(curvedAngle))
         endY = startY + scaledLength * sin(radians(curvedAngle))
 
-        self.branches.append({
-            'start': (startX, startY),
-            'end': (endX, endY),
-            'length': scaledLength,
-            'angle': curvedAngle,
-            'depth': depth,
-            'thickness': max(4, 6 * (0.9 ** depth))
-        })
+        build['branchRows'].append((startX, startY, endX, endY, max(4, 6 * (0.9 ** depth)), depth))
 
         if depth >= self.startLeafLayer:
-            self._addLeaves((startX + endX)/2, (startY + endY)/2, curvedAngle, depth-1, branchIndex)
+            self._addLeaves(build, (startX + endX)/2, (startY + endY)/2, curvedAngle, depth-1, branchIndex)
 
-        if depth < self.layers - 1:
-            newLength = length * 0.75 * params['lengthVar']
-            baseAngle = params['branchingAngle'] * 0.8
-            angleOffset = params['angleVar']
+        if depth < build['layers'] - 1:
+            newLength = length * 0.75 * lengthVar
+            baseAngle = branchingAngle * 0.8
+            angleOffset = angleVar
 
-            self._addBranch(endX, endY, newLength,
+            self._addBranch(build, endX, endY, newLength,
                         curvedAngle - baseAngle + angleOffset,
                         depth + 1, branchIndex * 2)
-            self._addBranch(endX, endY, newLength,
+            self._addBranch(build, endX, endY, newLength,
                         curvedAngle + baseAngle + angleOffset,
                         depth + 1, branchIndex * 2 + 1)
 
-            if params['extraBranch'] and random.random() < 0.2:
-                extraAngle = random.uniform(-baseAngle, baseAngle)
-                self._addBranch(endX, endY, newLength * 0.6,
+            if extraBranch and build['rng'].random() < 0.2:
+                extraAngle = build['rng'].uniform(-baseAngle, baseAngle)
+                self._addBranch(build, endX, endY, newLength * 0.6,
                             curvedAngle + extraAngle,
                             depth + 1, branchIndex * 2)
     #====Recursive Tree Branch Generation:Original Code written individually but debugged by Claude 3.5 due to complexity====
     
-    def _addLeafCluster(self, x, y, branchAngle, depth, leafParams, count, clusterType):
+    def _addLeafCluster(self, build, x, y, branchAngle, depth, leafSize, count, clusterType):
+        rng = build['rng']
         for i in range(count):
             if clusterType == 'main':
                 angleSpread = 180
-                radialDistance = random.uniform(2, 5)
-                sizeMultiplier = random.uniform(0.9, 1.3)
+                radialDistance = rng.uniform(2, 5)
+                sizeMultiplier = rng.uniform(0.9, 1.3)
             elif clusterType == 'extra':
                 angleSpread = 360
-                radialDistance = random.uniform(3, 6)
-                sizeMultiplier = random.uniform(0.6, 1.0)
+                radialDistance = rng.uniform(3, 6)
+                sizeMultiplier = rng.uniform(0.6, 1.0)
             else:
                 angleSpread = 120
-                radialDistance = random.uniform(2, 5)
-                sizeMultiplier = random.uniform(0.7, 1.1)
+                radialDistance = rng.uniform(2, 5)
+                sizeMultiplier = rng.uniform(0.7, 1.1)
             # cluster around a point
             # ===== leaf clustering methods reference from conversation with Claude 3.5 ====
-            angle = branchAngle + random.uniform(-angleSpread/2, angleSpread/2)
-            size = leafParams['size'] * sizeMultiplier * self.scale
+            angle = branchAngle + rng.uniform(-angleSpread/2, angleSpread/2)
+            size = leafSize * sizeMultiplier * self.scale
             
-            offsetAngle = random.uniform(0, 360)
+            offsetAngle = rng.uniform(0, 360)
 
             leafX = x + radialDistance * cos(radians(offsetAngle)) * self.scale
             leafY = y + radialDistance * sin(radians(offsetAngle)) * self.scale
             # ===== leaf clustering methods reference from conversation with Claude 3.5 ====
-            leaf = {
-                'x': leafX,
-                'y': leafY,
-                'size': size,
-                'angle': angle,
-                'color': random.choice(self.treeStyle['leafColors']),
-                'depth': depth,
-                'id': len(self.leaves)
-            }
-            self.leaves.append(leaf)
-
-    def _addLeaves(self, x, y, branchAngle, depth, branchIndex):
+            color = rng.choice(build['palette'])
+            build['leafRows'].append((leafX, leafY, size, angle, build['palette'].index(color)))
+
+    def _addLeaves(self, build, x, y, branchAngle, depth, branchIndex):
         if depth >= len(self.leafSeeds):
             return
             
-        leafParams = self.leafSeeds[depth][min(branchIndex, len(self.leafSeeds[depth])-1)]
+        leafSize = float(self.leafSeeds[depth][min(branchIndex, len(self.leafSeeds[depth])-1)])
         
+        rng = build['rng']
         minMain = max(self.minLeavesPerBranch,
-                      int(random.randint(*self.leafClusterSize['main']) * 
+                      int(rng.randint(*self.leafClusterSize['main']) * 
                           self.treeStyle['leafDensity']))
         minExtra = max(self.minLeavesPerBranch // 2,
-                       int(random.randint(*self.leafClusterSize['extra']) * 
+                       int(rng.randint(*self.leafClusterSize['extra']) * 
                            self.treeStyle['leafDensity']))
 
-        self._addLeafCluster(x, y, branchAngle, depth, leafParams, minMain, 'main')
-        self._addLeafCluster(x, y, branchAngle, depth, leafParams, minExtra, 'extra')
-        self._addLeafCluster(x, y, branchAngle, depth, leafParams, 
+        self._addLeafCluster(build, x, y, branchAngle, depth, leafSize, minMain, 'main')
+        self._addLeafCluster(build, x, y, branchAngle, depth, leafSize, minExtra, 'extra')
+        self._addLeafCluster(build, x, y, branchAngle, depth, leafSize, 
                             int(minExtra * 0.5), 'connecting')
 
-    def updateTreeLife(self, surroundingLifeRatios):
-        if not surroundingLifeRatios:
+    def updateTreeLife(self, surroundingLifeRatio):
+        if surroundingLifeRatio is None:
             return
         
-        self.lifeRatio = sum(surroundingLifeRatios) / len(surroundingLifeRatios)
+        self.lifeRatio = surroundingLifeRatio
         
         if self.lifeRatio <= self.growthPhaseEnd:
             growthProgress = self.lifeRatio / self.growthPhaseEnd
             targetLayers = int(growthProgress * self.maxLayers)
             
-            while self.layers < targetLayers and self.layers < self.maxLayers:
-                self.addLayer()
+            # only the seeds grow here; whoever owns the tree rebuilds its geometry
+            while self.layers < targetLayers and self.growLayer():
+                pass
         
         self._updateLeafAppearance()
+        self._updateStage()
+
+    @classmethod
+    def getPhaseBoundaries(cls):
+        """lifeRatio values where updateTreeLife starts doing something different: each
+        growth layer, the yellow/red colour switch and the phase edges"""
+        growthSteps = [cls.growthPhaseEnd * layer / cls.maxLayers for layer in range(1, cls.maxLayers + 1)]
+        return sorted(set(growthSteps + [
+            cls.colorChangeStart, (cls.colorChangeStart + cls.colorChangeEnd) / 2,
+            cls.colorChangeEnd, cls.leafFallStart, cls.leafFallEnd
+        ]))
+
+    def getStage(self):
+        """What the tree looks like, coarsely: (layers, leaf colour stage, visible-leaf bucket)"""
+        leafBucket = 0
+        if self.leafCount:
+            leafBucket = int(self.visibleLeafCount * self.leafBuckets / self.leafCount + 0.5)
+        return (self.geometryLayers, self.leafColorStage, leafBucket)
+
+    def _updateStage(self):
+        self.stage = self.getStage()
 
     def _updateLeafAppearance(self):
         if self.lifeRatio > self.colorChangeStart:
             if self.lifeRatio < self.colorChangeEnd:
                 progress = (self.lifeRatio - self.colorChangeStart) / (self.colorChangeEnd - self.colorChangeStart)
                 
-                if progress < 0.5:
-                    self.treeStyle['leafColors'] = self.leafColors['yellow']
-                else:
-                    self.treeStyle['leafColors'] = self.leafColors['red']
+                self.colorStage = 'yellow' if progress < 0.5 else 'red'
+                self.treeStyle['leafColors'] = self.leafColors[self.colorStage]
             
             if self.lifeRatio >= self.leafFallStart:
                 fallProgress = (self.lifeRatio - self.leafFallStart) / (self.leafFallEnd - self.leafFallStart)
-                targetLeafCount = int(len(self.leaves) * (1 - fallProgress))
+                targetLeafCount = int(self.leafCount * (1 - fallProgress))
                 
-                while len(self.visibleLeaves) > targetLeafCount:
-                    if self.visibleLeaves:
-                        self.visibleLeaves.remove(random.choice(list(self.visibleLeaves)))
+                # leaves fall in the tree's fixed fall order
+                self.visibleLeafCount = max(0, min(self.visibleLeafCount, targetLeafCount))
 
     def drawTree(self, game):
         if not game:
@@ -267,26 +428,38 @@ class Tree:
             
             if game.showDebugInfo:
                 print(f"Drawing tree at world({self.baseX}, {self.baseY}) -> screen({screenBaseX}, {screenBaseY})")
-                print(f"Tree has {len(self.branches)} branches and {len(self.leaves)} leaves")
+                print(f"Tree has {self.branchCount} branches and {self.leafCount} leaves")
             
-            sortedBranches = sorted(self.branches, key=lambda x: x['depth'])
-            for branch in sortedBranches:
-                startX, startY = game.worldToScreen(*branch['start'])
-                endX, endY = game.worldToScreen(*branch['end'])
-                
-                if game.showDebugInfo:
-                    print(f"Branch from ({startX}, {startY}) to ({endX}, {endY})")
-                
-                drawLine(startX, startY, endX, endY,
-                        fill='white',
-                        lineWidth=branch['thickness'])
+            # world -> screen for all points at once; arrays are already in draw order
+            zoom = game.zoomLevel
+            branches = self.branches
+            if self.branchCount:
+                startXs = ((branches['x0'] - game.cameraX) * zoom).tolist()
+                startYs = ((branches['y0'] - game.cameraY) * zoom).tolist()
+                endXs = ((branches['x1'] - game.cameraX) * zoom).tolist()
+                endYs = ((branches['y1'] - game.cameraY) * zoom).tolist()
+                for startX, startY, endX, endY, thickness in zip(startXs, startYs, endXs, endYs,
+                                                                 branches['thickness'].tolist()):
+                    if game.showDebugInfo:
+                        print(f"Branch from ({startX}, {startY}) to ({endX}, {endY})")
+                    
+                    drawLine(startX, startY, endX, endY,
+                            fill='white',
+                            lineWidth=thickness)
             
-            visibleLeaves = [leaf for leaf in self.leaves if leaf['id'] in self.visibleLeaves]
-            for leaf in sorted(visibleLeaves, key=lambda x: x['y']):
-                leafX, leafY = game.worldToScreen(leaf['x'], leaf['y'])
-                drawCircle(leafX, leafY, leaf['size'],
-                          fill=leaf['color'],
-                          rotateAngle=leaf['angle'])
+            visible = self.getVisibleLeafIndices()
+            if len(visible):
+                leaves = self.leaves
+                leafXs = ((leaves['x'][visible] - game.cameraX) * zoom).tolist()
+                leafYs = ((leaves['y'][visible] - game.cameraY) * zoom).tolist()
+                palette = self.leafPalette
+                for leafX, leafY, size, angle, color in zip(leafXs, leafYs,
+                                                            leaves['size'][visible].tolist(),
+                                                            leaves['angle'][visible].tolist(),
+                                                            leaves['color'][visible].tolist()):
+                    drawCircle(leafX, leafY, size,
+                              fill=palette[color],
+                              rotateAngle=angle)
                           
         except Exception as e:
             print(f"Error drawing tree: {str(e)}")
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+
+'''
+====Background Tree Generation====
+Runs Tree.buildGeometry on worker threads so the game loop never waits on
+the branch recursion. The main thread only submits and collects:
+
+    pool.request(tree)          -> build geometry for tree.layers and tree.colorStage
+                                   in the background
+    pool.collect()              -> [(tree, geometry)] for builds that finished
+    tree.setGeometry(geometry)  -> done by the caller, on the main thread
+
+buildGeometry only reads the tree's seeds and style and uses its own
+random.Random, so builds don't race with the main thread. A build that
+finishes after the tree has grown further or changed leaf colour is
+dropped; the caller asks again for the new layers and colour. At most one
+build per tree is in flight.
+'''
+
+class TreeGenerationPool:
+    def __init__(self, maxWorkers=2):
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers,
+                                           thread_name_prefix='tree-generation')
+        self.pending = {}  # treeId -> (tree, (layers, colorStage), future)
+        self.generated = 0
+        self.discarded = 0
+
+    def isPending(self, tree):
+        entry = self.pending.get(tree.treeId)
+        return entry is not None and entry[1] == self._buildKey(tree)
+
+    def request(self, tree):
+        if self.isPending(tree):
+            return
+        self.cancel(tree)
+        future = self.executor.submit(tree.buildGeometry, tree.layers, tree.colorStage)
+        self.pending[tree.treeId] = (tree, self._buildKey(tree), future)
+
+    def cancel(self, tree):
+        entry = self.pending.pop(tree.treeId, None)
+        if entry is not None:
+            entry[2].cancel()
+
+    def collect(self):
+        """Finished builds that still match their tree, as (tree, geometry) pairs"""
+        finished = []
+        for treeId, (tree, buildKey, future) in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[treeId]
+            if future.cancelled():
+                continue
+            try:
+                geometry = future.result()
+            except Exception as e:
+                print(f"Tree generation failed for tree {treeId}: {e}")
+                continue
+            if buildKey != self._buildKey(tree):
+                self.discarded += 1
+                continue
+            self.generated += 1
+            finished.append((tree, geometry))
+        return finished
+
+    @staticmethod
+    def _buildKey(tree):
+        return (tree.layers, tree.colorStage)
+
+    def clear(self):
+        for _, _, future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def shutdown(self):
+        self.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def getStats(self):
+        return {
+            'pending': len(self.pending),
+            'generated': self.generated,
+            'discarded': self.discarded
+        }
@@ -0,0 +1,228 @@
+from cmu_graphics import *
+from PIL import Image, ImageDraw, ImageColor
+import math
+import numpy as np
+from byte_cache import ByteLRUCache
+from tree import Tree
+
+'''
+====Tree Impostors====
+Instead of one drawLine per branch and one drawCircle per leaf every frame,
+each tree is rasterized once into a transparent RGBA image and drawn with a
+single drawImage. Images are cached by
+
+    (seed, layers, leaf colour stage, visible-leaf bucket, zoom bucket)
+
+which fully determines the picture (see Tree Geometry Layout in tree.py),
+so trees sharing a seed and stage share one image. Zoom is snapped to
+zoomStep; the image is stretched by the remaining zoom / bucket ratio when
+drawn. Images are rendered at supersample x size and downsampled, which
+stands in for the anti-aliasing the canvas gives individual shapes.
+
+Entries are evicted least-recently-used once the images exceed maxBytes
+(4 bytes per pixel). The cache also remembers the (seed, stage) each tree
+last drew with and how many trees drew each one; when a tree draws with a
+new stage and it was the last user of its old one, the old stage's images
+are dropped. Trees that are never drawn again (or only as blobs) just hold
+on to their one entry, and their images age out of the LRU.
+
+====Level of Detail====
+The tier is picked from the tree's on-screen size (extent * zoom, pixels)
+against lodThresholds = (fullSize, reducedSize):
+
+    full         size >= fullSize      every branch and visible leaf
+    reduced      size >= reducedSize   finest branch layer dropped, every other
+                                       leaf (drawn a bit larger), no supersampling
+    blob         smaller               one circle in the leaf colour, no image
+    placeholder  geometry not built yet (see tree_generator.py)
+
+tierCounts counts the trees drawn at each tier since beginFrame();
+lastTierCounts keeps the previous frame's totals for the debug overlay.
+'''
+
+class TreeImpostorCache:
+    lodTiers = ('full', 'reduced', 'blob', 'placeholder')
+
+    def __init__(self, maxBytes=48 * 1024 * 1024, zoomStep=0.25, supersample=2,
+                 lodThresholds=(150, 60)):
+        self.cache = ByteLRUCache(maxBytes)
+        self.zoomStep = zoomStep
+        self.supersample = supersample
+        self.rasterized = 0
+        self.invalidated = 0
+        self.drawnStages = {}  # treeId -> (seed, *stage) last drawn
+        self.stageUsers = {}   # (seed, *stage) -> number of trees last drawn with it
+        self.setLodThresholds(*lodThresholds)
+        self.tierCounts = dict.fromkeys(self.lodTiers, 0)
+        self.lastTierCounts = dict(self.tierCounts)
+
+    def setLodThresholds(self, fullSize, reducedSize):
+        self.fullSize = fullSize
+        self.reducedSize = min(reducedSize, fullSize)
+
+    def beginFrame(self):
+        self.lastTierCounts = self.tierCounts
+        self.tierCounts = dict.fromkeys(self.lodTiers, 0)
+
+    def getLodTier(self, tree, zoom):
+        if not tree.isGenerated:
+            return 'placeholder'
+        screenSize = tree.extent * zoom
+        if screenSize >= self.fullSize:
+            return 'full'
+        if screenSize >= self.reducedSize:
+            return 'reduced'
+        return 'blob'
+
+    def getZoomBucket(self, zoom):
+        return max(self.zoomStep, math.floor(zoom / self.zoomStep + 0.5) * self.zoomStep)
+
+    def getImpostor(self, tree, zoom, tier='full'):
+        """Cached (image, offsetX, offsetY, width, height) for the tree at this zoom bucket
+        and tier ('full' or 'reduced'), or None if the tree has nothing to draw. Offsets
+        are from the tree's base point."""
+        self.trackStage(tree)
+        zoomBucket = self.getZoomBucket(zoom)
+        key = (tree.seed, *tree.stage, zoomBucket, tier)
+        impostor = self.cache.get(key)
+        if impostor is None:
+            impostor = self.rasterize(tree, zoomBucket, reduced=(tier == 'reduced'))
+            if impostor is None:
+                return None
+            self.cache.put(key, impostor, impostor[3] * impostor[4] * 4)
+            self.rasterized += 1
+        return impostor
+
+    def trackStage(self, tree):
+        """Move the tree to its current stage; drop the images of the stage it left
+        if no other tree last drew with it"""
+        stageKey = (tree.seed, *tree.stage)
+        drawn = self.drawnStages.get(tree.treeId)
+        if drawn == stageKey:
+            return
+        self.drawnStages[tree.treeId] = stageKey
+        self.stageUsers[stageKey] = self.stageUsers.get(stageKey, 0) + 1
+        if drawn is None:
+            return
+        self.stageUsers[drawn] -= 1
+        if not self.stageUsers[drawn]:
+            del self.stageUsers[drawn]
+            self.invalidated += self.cache.removeWhere(lambda key: key[:4] == drawn)
+
+    def rasterize(self, tree, zoom, reduced=False):
+        if not tree.branchCount:
+            return None
+
+        # tree-local screen coordinates: base point at the origin
+        branches = tree.branches
+        keep = slice(None)
+        if reduced:
+            # branches are sorted by depth, so the coarser layers are a prefix
+            keep = slice(0, int(np.searchsorted(branches['depth'], max(1, tree.geometryLayers - 1))))
+        x0 = (branches['x0'][keep] - tree.baseX) * zoom
+        y0 = (branches['y0'][keep] - tree.baseY) * zoom
+        x1 = (branches['x1'][keep] - tree.baseX) * zoom
+        y1 = (branches['y1'][keep] - tree.baseY) * zoom
+        thickness = branches['thickness'][keep]
+        halfWidth = thickness / 2
+
+        visible = tree.getVisibleLeafIndices()
+        leaves = tree.leaves
+        if reduced:
+            visible = visible[leaves['fallRank'][visible] % 2 == 0]
+        leafX = (leaves['x'][visible] - tree.baseX) * zoom
+        leafY = (leaves['y'][visible] - tree.baseY) * zoom
+        leafSize = leaves['size'][visible] * (1.25 if reduced else 1.0)
+
+        # like drawTree, line widths and leaf radii are in pixels and don't scale with zoom
+        left = min(np.minimum(x0, x1).min() - halfWidth.max(),
+                   (leafX - leafSize).min() if len(visible) else math.inf)
+        top = min(np.minimum(y0, y1).min() - halfWidth.max(),
+                  (leafY - leafSize).min() if len(visible) else math.inf)
+        right = max(np.maximum(x0, x1).max() + halfWidth.max(),
+                    (leafX + leafSize).max() if len(visible) else -math.inf)
+        bottom = max(np.maximum(y0, y1).max() + halfWidth.max(),
+                     (leafY + leafSize).max() if len(visible) else -math.inf)
+        left, top = math.floor(left) - 1, math.floor(top) - 1
+        width, height = math.ceil(right) + 1 - left, math.ceil(bottom) + 1 - top
+
+        try:
+            ss = 1 if reduced else self.supersample
+            image = Image.new('RGBA', (width * ss, height * ss), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(image)
+
+            white = ImageColor.getrgb('white')
+            for startX, startY, endX, endY, thickness in zip(
+                    ((x0 - left) * ss).tolist(), ((y0 - top) * ss).tolist(),
+                    ((x1 - left) * ss).tolist(), ((y1 - top) * ss).tolist(),
+                    thickness.tolist()):
+                draw.line((startX, startY, endX, endY), fill=white,
+                          width=max(1, int(thickness * ss + 0.5)))
+
+            # leaves are already in back-to-front (y) order
+            palette = [ImageColor.getrgb(color) for color in tree.leafPalette]
+            for centerX, centerY, radius, color in zip(
+                    ((leafX - left) * ss).tolist(), ((leafY - top) * ss).tolist(),
+                    (leafSize * ss).tolist(), leaves['color'][visible].tolist()):
+                draw.ellipse((centerX - radius, centerY - radius, centerX + radius, centerY + radius),
+                             fill=palette[color])
+
+            if ss > 1:
+                image = image.resize((width, height), Image.LANCZOS)
+            return (CMUImage(image), left, top, width, height)
+        except Exception as e:
+            print(f"Error rasterizing tree impostor: {e}")
+            return None
+
+    def drawTree(self, tree, game):
+        """Draw the tree at the tier its on-screen size calls for"""
+        zoom = game.zoomLevel
+        tier = self.getLodTier(tree, zoom)
+        self.tierCounts[tier] += 1
+        screenX, screenY = game.worldToScreen(tree.baseX, tree.baseY)
+        if tier == 'placeholder':
+            self.drawPlaceholder(screenX, screenY, zoom)
+            return
+        if tier == 'blob':
+            self.drawBlob(tree, screenX, screenY, zoom)
+            return
+
+        impostor = self.getImpostor(tree, zoom, tier)
+        if impostor is None:
+            if tree.branchCount:
+                tree.drawTree(game)
+            return
+
+        image, offsetX, offsetY, width, height = impostor
+        stretch = game.zoomLevel / self.getZoomBucket(game.zoomLevel)
+        drawImage(image, screenX + offsetX * stretch, screenY + offsetY * stretch,
+                  width=width * stretch, height=height * stretch)
+
+    def drawBlob(self, tree, screenX, screenY, zoom):
+        """Far away: one circle in the leaf colour over the canopy, or a bare trunk line"""
+        centerX = screenX + tree.centerX * zoom
+        centerY = screenY + tree.centerY * zoom
+        if tree.visibleLeafCount and tree.leafPalette:
+            drawCircle(centerX, centerY, max(2, tree.extent * zoom / 2),
+                      fill=tree.leafPalette[0])
+        else:
+            drawLine(screenX, screenY, screenX, screenY - tree.extent * zoom,
+                    fill='white', lineWidth=2)
+
+    def drawPlaceholder(self, screenX, screenY, zoom):
+        """Bare trunk shown while a tree's geometry is still being built"""
+        trunkHeight = Tree.baseTrunkLength * Tree.scale * zoom
+        drawLine(screenX, screenY, screenX, screenY - trunkHeight,
+                fill='white', lineWidth=4, opacity=60)
+
+    def clear(self):
+        self.cache.clear()
+        self.drawnStages.clear()
+        self.stageUsers.clear()
+
+    def getStats(self):
+        stats = self.cache.getStats()
+        stats['rasterized'] = self.rasterized
+        stats['invalidated'] = self.invalidated
+        stats['tiers'] = dict(self.lastTierCounts)
+        return stats
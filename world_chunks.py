@@ -0,0 +1,104 @@
+import numpy as np
+
+'''
+====Chunked World Scheduling====
+The world is split into fixed-size chunks (16x16 cells by default).
+
+Chunks near the camera are where exploration happens: the first time a
+chunk comes into view every cell in it is initialized in one array write,
+instead of Game.update initializing cells one by one every frame.
+
+In eager mode chunks are also scheduled:
+
+    active chunk   -> near the camera or under a healing effect; stepped every tick
+    dormant chunk  -> not stepped at all; because decay is linear the store
+                      already derives its cells in closed form, and waking a
+                      chunk just bakes that value in (materialize)
+
+In lazy mode (the default) nothing is ever stepped, so only exploration
+runs. Chunks are views onto CellStateStore, not owners of their own state
+arrays: the store stays one dense array set sized to the map, which already
+keeps the tick cost independent of the explored area.
+'''
+
+class Chunk:
+    def __init__(self, cellStates, chunkRow, chunkCol, size):
+        self.chunkRow = chunkRow
+        self.chunkCol = chunkCol
+        self.rows = slice(chunkRow * size, min(cellStates.worldHeight, (chunkRow + 1) * size))
+        self.cols = slice(chunkCol * size, min(cellStates.worldWidth, (chunkCol + 1) * size))
+        self.explored = False
+        self.active = False
+
+    def getBounds(self):
+        return self.rows.start, self.cols.start, self.rows.stop, self.cols.stop
+
+
+class ChunkManager:
+    def __init__(self, cellStates, chunkSize=16):
+        self.cellStates = cellStates
+        self.chunkSize = chunkSize
+        self.chunkRows = (cellStates.worldHeight + chunkSize - 1) // chunkSize
+        self.chunkCols = (cellStates.worldWidth + chunkSize - 1) // chunkSize
+        self.chunks = {}
+        self.active = set()
+        self.terrainIds = None
+
+    def setTerrainGrid(self, grid):
+        """Cache the map's terrain as store terrain ids so chunks can be initialized in bulk"""
+        states = self.cellStates
+        self.terrainIds = np.full((states.worldHeight, states.worldWidth),
+                                  states.UNINITIALIZED, dtype=np.int16)
+        for row, gridRow in enumerate(grid[:states.worldHeight]):
+            for col, cell in enumerate(gridRow[:states.worldWidth]):
+                self.terrainIds[row, col] = states.getTerrainId(cell['terrain'])
+
+    def getChunk(self, chunkRow, chunkCol):
+        key = (chunkRow, chunkCol)
+        if key not in self.chunks:
+            self.chunks[key] = Chunk(self.cellStates, chunkRow, chunkCol, self.chunkSize)
+        return self.chunks[key]
+
+    def chunksInRegion(self, startRow, startCol, endRow, endCol):
+        size = self.chunkSize
+        firstRow, lastRow = max(0, startRow // size), min(self.chunkRows, -(-endRow // size))
+        firstCol, lastCol = max(0, startCol // size), min(self.chunkCols, -(-endCol // size))
+        return [(chunkRow, chunkCol)
+                for chunkRow in range(firstRow, lastRow)
+                for chunkCol in range(firstCol, lastCol)]
+
+    def explore(self, viewRegions):
+        """Initialize every chunk touching the view that hasn't been seen yet.
+        Regions are (startRow, startCol, endRow, endCol). Returns the chunk keys in view."""
+        inView = {key for region in viewRegions for key in self.chunksInRegion(*region)}
+        for key in inView:
+            chunk = self.getChunk(*key)
+            if not chunk.explored and self.terrainIds is not None:
+                self.cellStates.initializeBlock(chunk.rows, chunk.cols,
+                                                self.terrainIds[chunk.rows, chunk.cols])
+                chunk.explored = True
+        return inView
+
+    def schedule(self, viewRegions, healingRegions=()):
+        """Explore the view, then activate chunks touching it or any healing region; the
+        rest go dormant. For eager mode, where active chunks are stepped. Returns
+        (woken, slept) chunk keys."""
+        wanted = self.explore(viewRegions)
+        wanted |= {key for region in healingRegions for key in self.chunksInRegion(*region)}
+
+        woken = wanted - self.active
+        slept = self.active - wanted
+        for key in woken:
+            chunk = self.getChunk(*key)
+            # catch up in closed form before the chunk is stepped again
+            self.cellStates.materialize(chunk.rows, chunk.cols)
+            chunk.active = True
+        for key in slept:
+            self.chunks[key].active = False
+        self.active = wanted
+        return woken, slept
+
+    def materializeActive(self):
+        for key in self.active:
+            chunk = self.chunks[key]
+            self.cellStates.materialize(chunk.rows, chunk.cols)